@@ -3,7 +3,6 @@
 import React, { useState, useEffect } from 'react';
 import AdminLayout from '@/components/Admin/AdminLayout';
 import RequireAuth from '@/components/Helper/RequireAuth';
-import * as XLSX from 'xlsx';
 
 interface TourData {
   id?: number;
@@ -17,8 +16,30 @@ interface TourData {
   'Overnight_stay': string;
 }
 
+const PAGE_SIZE = 50;
+
+// Table columns and the /api/tour-data sort field behind each
+const COLUMNS: { label: string; field: keyof TourData }[] = [
+  { label: 'Country', field: 'Tourist country' },
+  { label: 'Month', field: 'Month' },
+  { label: 'Duration', field: 'Duration' },
+  { label: 'Price', field: 'Price USD' },
+  { label: 'Location', field: 'Location' },
+  { label: 'Interest', field: 'Interest' },
+  { label: 'Activities', field: 'Activities' },
+  { label: 'Stay', field: 'Overnight_stay' },
+];
+
 export default function MlDataPage() {
   const [data, setData] = useState<TourData[]>([]);
+  const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [sort, setSort] = useState<keyof TourData>('id');
+  const [order, setOrder] = useState<'asc' | 'desc'>('asc');
+  const [search, setSearch] = useState('');
+  const [query, setQuery] = useState('');
+  // Content hash of the dataset the loaded ids refer to; sent with edits and deletes
+  const [version, setVersion] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [isEditing, setIsEditing] = useState(false);
@@ -47,12 +68,19 @@ export default function MlDataPage() {
     'Beach', 'Archaeology', 'Relaxation', 'Historical'
   ];
 
-  // Load data from Excel file
+  // Load the current page of data
   const loadData = async () => {
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch('/api/tour-data', {
+      const params = new URLSearchParams({
+        page: String(page),
+        pageSize: String(PAGE_SIZE),
+        sort,
+        order,
+        q: query,
+      });
+      const response = await fetch(`/api/tour-data?${params}`, {
         method: 'GET',
       });
 
@@ -62,6 +90,8 @@ export default function MlDataPage() {
 
       const result = await response.json();
       setData(result.data || []);
+      setTotal(result.total ?? 0);
+      setVersion(result.version || '');
     } catch (err) {
       setError('Failed to load data: ' + (err as Error).message);
     } finally {
@@ -69,21 +99,27 @@ export default function MlDataPage() {
     }
   };
 
-  // Save data to Excel file
-  const saveData = async (newData: TourData[]) => {
+  // Save one record change to the Excel file
+  const saveRecord = async (method: 'POST' | 'PUT' | 'DELETE', body?: object, id?: number) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch('/api/tour-data', {
-        method: 'POST',
+      const url = method === 'DELETE' ? `/api/tour-data?id=${id}` : '/api/tour-data';
+      const response = await fetch(url, {
+        method,
         headers: {
           'Content-Type': 'application/json',
+          'If-Match': `"${version}"`,
         },
-        body: JSON.stringify({ data: newData }),
+        body: body ? JSON.stringify(body) : undefined,
       });
 
       if (!response.ok) {
-        throw new Error('Failed to save data');
+        const result = await response.json().catch(() => ({}));
+        if (response.status === 409) {
+          await loadData(); // Ids changed; show the current rows
+        }
+        throw new Error(result.error || 'Failed to save data');
       }
 
       await loadData(); // Reload data
@@ -96,7 +132,28 @@ export default function MlDataPage() {
 
   useEffect(() => {
     loadData();
-  }, []);
+  }, [page, sort, order, query]);
+
+  // Search once typing pauses, from the first page
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setQuery(search.trim());
+      setPage(1);
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const handleSort = (field: keyof TourData) => {
+    if (sort === field) {
+      setOrder(order === 'asc' ? 'desc' : 'asc');
+    } else {
+      setSort(field);
+      setOrder('asc');
+    }
+    setPage(1);
+  };
+
+  const totalPages = Math.max(1, Math.ceil(total / PAGE_SIZE));
 
   const handleInputChange = (field: keyof TourData, value: string) => {
     setFormData(prev => ({
@@ -106,9 +163,7 @@ export default function MlDataPage() {
   };
 
   const handleAdd = () => {
-    const newData = [...data, { ...formData, id: Date.now() }];
-    setData(newData);
-    saveData(newData);
+    saveRecord('POST', { record: formData });
     setFormData({
       'Tourist country': '',
       'Month': '',
@@ -132,11 +187,7 @@ export default function MlDataPage() {
   };
 
   const handleUpdate = () => {
-    const newData = data.map(item =>
-      item.id === editingId ? { ...formData, id: editingId } : item
-    );
-    setData(newData);
-    saveData(newData);
+    saveRecord('PUT', { id: editingId, record: formData });
     setIsEditing(false);
     setEditingId(null);
     setFormData({
@@ -157,9 +208,7 @@ export default function MlDataPage() {
 
   const confirmDelete = () => {
     if (confirmDeleteId === null) return;
-    const newData = data.filter(item => item.id !== confirmDeleteId);
-    setData(newData);
-    saveData(newData);
+    saveRecord('DELETE', undefined, confirmDeleteId);
     setConfirmDeleteId(null);
   };
 
@@ -180,20 +229,6 @@ export default function MlDataPage() {
     });
   };
 
-  if (loading) {
-    return (
-      <RequireAuth>
-        <AdminLayout title="ML Data Operations">
-          <div className="bg-white p-6 rounded-lg shadow">
-            <div className="flex items-center justify-center h-32">
-              <div className="text-lg">Loading...</div>
-            </div>
-          </div>
-        </AdminLayout>
-      </RequireAuth>
-    );
-  }
-
   return (
     <RequireAuth>
       <AdminLayout title="ML Data Operations">
@@ -209,6 +244,17 @@ export default function MlDataPage() {
             </button>
           </div>
 
+          <div className="mb-4 flex items-center space-x-4">
+            <input
+              type="text"
+              value={search}
+              onChange={(e) => setSearch(e.target.value)}
+              className="w-full md:w-1/3 p-2 border border-gray-300 rounded focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+              placeholder="Search country, month, location, interest..."
+            />
+            {loading && <div className="text-sm text-gray-500">Loading...</div>}
+          </div>
+
           {error && (
             <div className="mb-4 p-4 bg-red-100 border border-red-400 text-red-700 rounded">
               {error}
@@ -344,14 +390,16 @@ export default function MlDataPage() {
             <table className="min-w-full table-auto border-collapse border border-gray-300">
               <thead className="bg-gray-100">
                 <tr>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Country</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Month</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Duration</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Price</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Location</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Interest</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Activities</th>
-                  <th className="border border-gray-300 px-4 py-2 text-left">Stay</th>
+                  {COLUMNS.map(({ label, field }) => (
+                    <th
+                      key={field}
+                      onClick={() => handleSort(field)}
+                      className="border border-gray-300 px-4 py-2 text-left cursor-pointer select-none hover:bg-gray-200"
+                    >
+                      {label}
+                      {sort === field && (order === 'asc' ? ' ▲' : ' ▼')}
+                    </th>
+                  ))}
                   <th className="border border-gray-300 px-4 py-2 text-left">Actions</th>
                 </tr>
               </thead>
@@ -359,7 +407,7 @@ export default function MlDataPage() {
                 {data.length === 0 ? (
                   <tr>
                     <td colSpan={9} className="border border-gray-300 px-4 py-8 text-center text-gray-500">
-                      No data available. Add some records to get started.
+                      {query ? 'No records match your search.' : 'No data available. Add some records to get started.'}
                     </td>
                   </tr>
                 ) : (
@@ -406,8 +454,25 @@ export default function MlDataPage() {
             </table>
           </div>
 
-          <div className="mt-4 text-sm text-gray-600">
-            Total records: {data.length}
+          <div className="mt-4 flex justify-between items-center text-sm text-gray-600">
+            <div>Total records: {total}</div>
+            <div className="flex items-center space-x-2">
+              <button
+                onClick={() => setPage(page - 1)}
+                className="px-3 py-1 rounded border border-gray-300 hover:bg-gray-100 disabled:opacity-50"
+                disabled={page <= 1 || loading}
+              >
+                Prev
+              </button>
+              <span>Page {page} of {totalPages}</span>
+              <button
+                onClick={() => setPage(page + 1)}
+                className="px-3 py-1 rounded border border-gray-300 hover:bg-gray-100 disabled:opacity-50"
+                disabled={page >= totalPages || loading}
+              >
+                Next
+              </button>
+            </div>
           </div>
         </div>
         {/* Confirm Delete Modal */}
@@ -1,5 +1,6 @@
 import { NextRequest, NextResponse } from 'next/server';
 import * as XLSX from 'xlsx';
+import * as crypto from 'crypto';
 import * as fs from 'fs';
 import * as path from 'path';
 
@@ -10,6 +11,10 @@ const EXCEL_FILE_PATH = path.join(
   'SRI_LANKA_TOUR_DATASET.xlsx'
 );
 
+// FastAPI recommendation service; it serves the dataset from memory via /packages
+const ML_API_URL = process.env.ML_API_URL || 'http://localhost:8000';
+const ML_API_TIMEOUT_MS = 3000;
+
 interface TourData {
   id?: number;
   'Tourist country': string;
@@ -22,6 +27,200 @@ interface TourData {
   'Overnight_stay': string;
 }
 
+interface PageQuery {
+  page: number;
+  pageSize: number;
+  sort: string;
+  order: 'asc' | 'desc';
+  q: string;
+}
+
+const SEARCH_FIELDS: (keyof TourData)[] = [
+  'Tourist country',
+  'Month',
+  'Location',
+  'Interest',
+  'Activities',
+  'Overnight_stay',
+];
+
+// Sort orders shared with the service's /packages (package_index.py): months by calendar,
+// prices by level, unknown values last
+const MONTH_ORDER = [
+  'january', 'february', 'march', 'april', 'may', 'june',
+  'july', 'august', 'september', 'october', 'november', 'december',
+];
+const PRICE_ORDER = ['low', 'medium', 'high'];
+
+// ✅ Utility function: primary sort key of a field value, before its text
+function sortKey(field: keyof TourData, text: string): number {
+  if (field === 'Duration') {
+    const duration = Number(text);
+    return text !== '' && Number.isFinite(duration) ? duration : Infinity;
+  }
+  const order = field === 'Month' ? MONTH_ORDER : field === 'Price USD' ? PRICE_ORDER : null;
+  if (!order) {
+    return 0;
+  }
+  const position = order.indexOf(text);
+  return position < 0 ? order.length : position;
+}
+
+function parsePageQuery(searchParams: URLSearchParams): PageQuery {
+  return {
+    page: Math.max(1, Number(searchParams.get('page')) || 1),
+    pageSize: Math.min(500, Math.max(1, Number(searchParams.get('pageSize')) || 50)),
+    sort: searchParams.get('sort') || 'id',
+    order: searchParams.get('order') === 'desc' ? 'desc' : 'asc',
+    q: searchParams.get('q') || '',
+  };
+}
+
+// Last computed content hash of the Excel file and the file stats it was computed for
+let cachedVersion: { mtimeMs: number; size: number; digest: string } | null = null;
+
+// ✅ Utility function: content hash of the Excel file; record ids are row numbers in this version.
+// The hash is reused while the file's mtime and size are unchanged, unless fresh is set
+function datasetVersion(fresh = false): string {
+  const stats = fs.statSync(EXCEL_FILE_PATH, { throwIfNoEntry: false });
+  if (!stats) {
+    return '';
+  }
+  if (
+    fresh ||
+    !cachedVersion ||
+    cachedVersion.mtimeMs !== stats.mtimeMs ||
+    cachedVersion.size !== stats.size
+  ) {
+    const digest = crypto.createHash('sha256').update(fs.readFileSync(EXCEL_FILE_PATH)).digest('hex');
+    cachedVersion = { mtimeMs: stats.mtimeMs, size: stats.size, digest };
+  }
+  return cachedVersion.digest;
+}
+
+// ✅ Utility function: reject id-based writes sent with another version of the file (If-Match)
+function rejectStaleVersion(request: NextRequest): NextResponse | null {
+  // Hash the file itself, as the write is about to rewrite it anyway
+  if (request.headers.get('if-match') === `"${datasetVersion(true)}"`) {
+    return null;
+  }
+  return NextResponse.json(
+    { error: 'The dataset has changed since it was loaded. Reload and try again.' },
+    { status: 409 }
+  );
+}
+
+// ✅ Utility function: fetch one page from the recommendation service (null if it cannot serve it)
+async function fetchPackagePage(
+  query: PageQuery,
+  ifNoneMatch: string | null,
+  version: string
+): Promise<NextResponse | null> {
+  const params = new URLSearchParams({
+    page: String(query.page),
+    page_size: String(query.pageSize),
+    sort: query.sort,
+    order: query.order,
+    q: query.q,
+  });
+  const response = await fetch(`${ML_API_URL}/packages?${params}`, {
+    headers: ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : undefined,
+    cache: 'no-store',
+    signal: AbortSignal.timeout(ML_API_TIMEOUT_MS),
+  });
+
+  // Ids are only valid for the file the service snapshot was built from, e.g. not after a failed
+  // reload or when the service was started from a model artifact
+  if (!version || response.headers.get('x-dataset-sha256') !== version) {
+    return null;
+  }
+
+  const headers = {
+    ETag: response.headers.get('etag') || '',
+    'Cache-Control': 'no-cache',
+  };
+  if (response.status === 304) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+  if (!response.ok) {
+    // e.g. the dataset has not been loaded into the service yet
+    return null;
+  }
+
+  const body = await response.json();
+  return NextResponse.json(
+    { data: body.items, total: body.total, page: body.page, pageSize: body.page_size, version },
+    { headers }
+  );
+}
+
+// ✅ Utility function: search, sort and slice rows read from the Excel file (fallback path)
+function pageRows(rows: TourData[], query: PageQuery) {
+  const words = query.q.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+  let matched = rows;
+  if (words.length > 0) {
+    matched = rows.filter((row) => {
+      const tokens = SEARCH_FIELDS.flatMap(
+        (field) => String(row[field] ?? '').toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []
+      );
+      return words.every((word) => tokens.some((token) => token.startsWith(word)));
+    });
+  }
+
+  const sortField = query.sort as keyof TourData;
+  if (query.sort !== 'id' && SEARCH_FIELDS.concat(['Duration', 'Price USD']).includes(sortField)) {
+    // By sort key, then lowercase text; the stable sort keeps id order for ties, as /packages does
+    const keyed = matched.map((row) => {
+      const text = String(row[sortField] ?? '').toLowerCase().trim();
+      return { row, key: sortKey(sortField, text), text };
+    });
+    keyed.sort((a, b) =>
+      a.key !== b.key ? a.key - b.key : a.text < b.text ? -1 : a.text > b.text ? 1 : 0
+    );
+    matched = keyed.map(({ row }) => row);
+  }
+  if (query.order === 'desc') {
+    matched = [...matched].reverse();
+  }
+
+  const start = (query.page - 1) * query.pageSize;
+  return {
+    data: matched.slice(start, start + query.pageSize),
+    total: matched.length,
+    page: query.page,
+    pageSize: query.pageSize,
+  };
+}
+
+// ✅ Utility function: ask the recommendation service to reload the changed dataset (best effort)
+async function refreshModel() {
+  try {
+    await fetch(`${ML_API_URL}/load-dataset?file_path=SRI_LANKA_TOUR_DATASET.xlsx`, {
+      method: 'POST',
+      signal: AbortSignal.timeout(30000),
+    });
+  } catch (error) {
+    console.warn('⚠️ Could not refresh recommendation service dataset:', error);
+  }
+}
+
+// ✅ Utility function: read the first sheet as rows
+function readRows(): Record<string, unknown>[] {
+  const workbook = readWorkbook();
+  const worksheet = workbook.Sheets[workbook.SheetNames[0]];
+  return XLSX.utils.sheet_to_json<Record<string, unknown>>(worksheet, {
+    defval: '',
+    blankrows: false,
+  });
+}
+
+// ✅ Utility function: write rows as the only sheet
+function writeRows(rows: Record<string, unknown>[]) {
+  const workbook = XLSX.utils.book_new();
+  XLSX.utils.book_append_sheet(workbook, XLSX.utils.json_to_sheet(rows), 'Sheet1');
+  writeWorkbook(workbook);
+}
+
 // ✅ Utility function: safely read workbook
 function readWorkbook(): XLSX.WorkBook {
   const buffer = fs.readFileSync(EXCEL_FILE_PATH);
@@ -34,13 +233,25 @@ function writeWorkbook(workbook: XLSX.WorkBook) {
   fs.writeFileSync(EXCEL_FILE_PATH, wbout);
 }
 
-// GET - Read data from Excel file
-export async function GET() {
+// GET - Read one page of data: from the recommendation service, or the Excel file if it is unavailable
+export async function GET(request: NextRequest) {
+  const query = parsePageQuery(new URL(request.url).searchParams);
+  const version = datasetVersion();
+
+  try {
+    const page = await fetchPackagePage(query, request.headers.get('if-none-match'), version);
+    if (page) {
+      return page;
+    }
+  } catch (error: unknown) {
+    console.warn('⚠️ Recommendation service unavailable, reading Excel file:', error);
+  }
+
   try {
     console.log('🔍 Reading Excel file from:', EXCEL_FILE_PATH);
 
     if (!fs.existsSync(EXCEL_FILE_PATH)) {
-      return NextResponse.json({ data: [] });
+      return NextResponse.json({ data: [], total: 0, page: query.page, pageSize: query.pageSize });
     }
 
     const workbook = readWorkbook();
@@ -68,7 +279,7 @@ export async function GET() {
         row['Overnight_stay'] || row['Overnightstay'] || row['Stay'] || '',
     }));
 
-    return NextResponse.json({ data: structuredData });
+    return NextResponse.json({ ...pageRows(structuredData, query), version });
   } catch (error: unknown) {
     console.error('❌ Error in GET /api/tour-data:', error);
     const errorMessage = error instanceof Error ? error.message : String(error);
@@ -79,22 +290,23 @@ export async function GET() {
   }
 }
 
-// POST - Write data to Excel file
+// POST - Append one record ({ record }) or replace all data ({ data }) in the Excel file
 export async function POST(request: NextRequest) {
   try {
-    const { data }: { data: TourData[] } = await request.json();
+    const { data, record }: { data?: TourData[]; record?: TourData } = await request.json();
 
-    if (!Array.isArray(data)) {
+    if (record) {
+      // eslint-disable-next-line @typescript-eslint/no-unused-vars
+      const { id, ...fields } = record;
+      writeRows([...readRows(), fields]);
+    } else if (Array.isArray(data)) {
+      const dataForExcel = data.map(({ id, ...rest }) => rest);
+      writeRows(dataForExcel);
+    } else {
       return NextResponse.json({ error: 'Invalid data format' }, { status: 400 });
     }
 
-    const dataForExcel = data.map(({ id, ...rest }) => rest);
-    const worksheet = XLSX.utils.json_to_sheet(dataForExcel);
-
-    const workbook = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(workbook, worksheet, 'Sheet1');
-
-    writeWorkbook(workbook);
+    await refreshModel();
 
     return NextResponse.json({
       success: true,
@@ -110,9 +322,50 @@ export async function POST(request: NextRequest) {
   }
 }
 
+// PUT - Update one record by ID ({ id, record })
+export async function PUT(request: NextRequest) {
+  try {
+    const stale = rejectStaleVersion(request);
+    if (stale) {
+      return stale;
+    }
+
+    const { id, record }: { id?: number; record?: TourData } = await request.json();
+
+    const rows = readRows();
+    if (!record || !id || id < 1 || id > rows.length) {
+      return NextResponse.json({ error: 'Valid id and record are required' }, { status: 400 });
+    }
+
+    // eslint-disable-next-line @typescript-eslint/no-unused-vars
+    const { id: _id, ...fields } = record;
+    rows[id - 1] = fields;
+    writeRows(rows);
+
+    await refreshModel();
+
+    return NextResponse.json({
+      success: true,
+      message: 'Record updated successfully',
+    });
+  } catch (error: unknown) {
+    console.error('❌ Error updating record:', error);
+    const errorMessage = error instanceof Error ? error.message : String(error);
+    return NextResponse.json(
+      { error: `Failed to update record: ${errorMessage}` },
+      { status: 500 }
+    );
+  }
+}
+
 // DELETE - Delete record by ID
 export async function DELETE(request: NextRequest) {
   try {
+    const stale = rejectStaleVersion(request);
+    if (stale) {
+      return stale;
+    }
+
     const { searchParams } = new URL(request.url);
     const id = searchParams.get('id');
 
@@ -138,6 +391,8 @@ export async function DELETE(request: NextRequest) {
 
     writeWorkbook(newWorkbook);
 
+    await refreshModel();
+
     return NextResponse.json({
       success: true,
       message: 'Record deleted successfully',
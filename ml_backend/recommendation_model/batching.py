@@ -0,0 +1,70 @@
+# batching.py
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# score_batch(user_preferences, top_k, diverse) -> one recommendation list per user
+BatchScorer = Callable[[List[Dict[str, Any]], List[int], List[bool]], List[List[Dict]]]
+
+
+class RecommendationBatcher:
+    """Coalesces concurrent recommendation requests into one batched scoring call.
+
+    Requests are collected until ``window_ms`` has passed since the first
+    pending request or ``max_batch_size`` requests are waiting, whichever comes
+    first. The batch is then scored with a single ``score_batch`` call and each
+    caller's future is resolved with its own recommendations.
+    """
+
+    def __init__(self, score_batch: BatchScorer, window_ms: float = 2.0, max_batch_size: int = 64):
+        self.score_batch = score_batch
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Counters reported by /model-info
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, user_preferences: Dict[str, Any], top_k: int, diverse: bool = False) -> List[Dict]:
+        """Queue one request and wait for its recommendations"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user_preferences, top_k, diverse, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+
+        try:
+            results = self.score_batch([item[0] for item in batch], [item[1] for item in batch],
+                                       [item[2] for item in batch])
+        except Exception as e:
+            logger.error(f"Error scoring batch of {len(batch)} requests: {e}")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), recommendations in zip(batch, results):
+            # The caller may have been cancelled while waiting
+            if not future.done():
+                future.set_result(recommendations)
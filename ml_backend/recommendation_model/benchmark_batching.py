@@ -0,0 +1,90 @@
+# benchmark_batching.py
+"""Load test for request coalescing (RecommendationBatcher).
+
+Runs a fixed number of concurrent closed-loop clients on one event loop, the
+way uvicorn serves /recommend, first scoring every request on its own and then
+through the batcher with each configured window. Reports throughput and
+latency percentiles so the throughput gain can be weighed against the p99
+cost of the window.
+
+Usage:
+    python benchmark_batching.py --scale 50 --clients 64 --windows 0.5 1 2 5
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from batching import RecommendationBatcher
+from benchmark_scoring import build_model
+
+
+async def run_clients(handle, users, clients: int, duration: float, top_k: int):
+    """Closed-loop clients calling handle(user) until duration elapses; returns latencies in ms"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def client(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await handle(users[i % len(users)], top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += clients
+
+    await asyncio.gather(*[client(c) for c in range(clients)])
+    return np.array(latencies)
+
+
+def report(label: str, latencies: np.ndarray, duration: float):
+    print(f"{label:<16} {len(latencies) / duration:>10.0f} {np.percentile(latencies, 50):>10.2f} "
+          f"{np.percentile(latencies, 99):>10.2f}")
+
+
+async def main_async(args):
+    model = build_model(args.dataset, args.scale, args.precision)
+    users = model.create_test_users(args.users)
+    print(f"Catalogue size: {len(model.row_index)} packages, {args.clients} concurrent clients, top_k={args.top_k}")
+    print(f"{'mode':<16} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+
+    async def unbatched(user, top_k):
+        # Yield like an endpoint awaiting the request body, then score inline
+        await asyncio.sleep(0)
+        return model.get_recommendations(user, top_k)
+
+    report("unbatched", await run_clients(unbatched, users, args.clients, args.duration, args.top_k), args.duration)
+
+    for window in args.windows:
+        batcher = RecommendationBatcher(model.get_recommendations_batch, window_ms=window,
+                                        max_batch_size=args.max_batch_size)
+
+        async def batched(user, top_k):
+            return await batcher.submit(user, top_k)
+
+        latencies = await run_clients(batched, users, args.clients, args.duration, args.top_k)
+        report(f"window {window}ms", latencies, args.duration)
+        print(f"{'':<16} mean batch size {batcher.requests / max(batcher.batches, 1):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /recommend request coalescing")
+    parser.add_argument("--dataset", default="SRI_LANKA_TOUR_DATASET.xlsx")
+    parser.add_argument("--scale", type=int, default=1, help="Tile the catalogue this many times")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64")
+    parser.add_argument("--users", type=int, default=200, help="Distinct synthetic queries")
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per mode")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.5, 1.0, 2.0, 5.0],
+                        help="Batching windows to test, in ms")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
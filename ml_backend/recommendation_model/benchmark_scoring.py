@@ -0,0 +1,78 @@
+# benchmark_scoring.py
+"""Microbenchmark comparing scoring backends on the same queries.
+
+The catalogue can be tiled with --scale to see how the backends behave on
+larger datasets. Every backend is checked against the NumPy backend before
+timing.
+
+Usage:
+    python benchmark_scoring.py --dataset SRI_LANKA_TOUR_DATASET.xlsx --scale 100 --top-k 10 --precision float32
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from model import TravelRecommendationModel
+from scoring_backends import SCORING_BACKENDS, get_scoring_backend
+
+
+def build_model(dataset: str, scale: int, precision: str = 'float64') -> TravelRecommendationModel:
+    """Preprocess the dataset and tile the catalogue scale times"""
+    model = TravelRecommendationModel(precision=precision)
+    if not model.load_data(dataset):
+        raise SystemExit(f"Could not load dataset from {dataset}")
+    model.preprocess_data()
+
+    if scale > 1:
+        content_scores = model.content_scores
+        model.df_processed = pd.concat([model.df_processed] * scale, ignore_index=True)
+        model._build_indexes()
+        model.content_scores = np.tile(content_scores, scale)
+    return model
+
+
+def run_backend(model: TravelRecommendationModel, users, top_k: int, repeats: int):
+    """Time get_recommendations for every user, returning per-query latencies in ms"""
+    latencies = []
+    for _ in range(repeats):
+        for user in users:
+            start = time.perf_counter()
+            model.get_recommendations(user, top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recommendation scoring backends")
+    parser.add_argument("--dataset", default="SRI_LANKA_TOUR_DATASET.xlsx")
+    parser.add_argument("--scale", type=int, default=1, help="Tile the catalogue this many times")
+    parser.add_argument("--users", type=int, default=50, help="Synthetic queries per repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    model = build_model(args.dataset, args.scale, args.precision)
+    users = model.create_test_users(args.users)
+    print(f"Catalogue size: {len(model.row_index)} packages, top_k={args.top_k}, precision={args.precision}")
+
+    reference = [model.get_recommendations(user, args.top_k) for user in users]
+
+    print(f"{'backend':<10} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'identical':>10}")
+    for name in SCORING_BACKENDS:
+        model.scoring_backend = get_scoring_backend(name)
+        # Warm-up also triggers JIT compilation
+        identical = all(model.get_recommendations(user, args.top_k) == expected
+                        for user, expected in zip(users, reference))
+        latencies = run_backend(model, users, args.top_k, args.repeats)
+        print(f"{name:<10} {latencies.mean():>10.3f} {np.percentile(latencies, 50):>10.3f} "
+              f"{np.percentile(latencies, 99):>10.3f} {str(identical):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmark_startup.py
+"""Cold-start benchmark for the serving-only import path.
+
+Builds the model once, saves it both as a full model pickle and as a serving
+runtime archive, then starts a fresh interpreter per target with
+``python -X importtime`` and reports:
+
+  - total import time and the heaviest imports made by the target module,
+  - time to load the artifact and answer a first query,
+  - peak resident memory, and whether pandas / scikit-learn were imported.
+
+Each target is run several times and the median is reported.
+
+Usage:
+    python benchmark_startup.py --dataset SRI_LANKA_TOUR_DATASET.xlsx --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Child programs: import, optionally load an artifact and score one query, then report
+CHILD_PREAMBLE = """
+import json, resource, sys, time
+start = time.perf_counter()
+
+def peak_rss_kb():
+    # ru_maxrss survives fork+exec on Linux, so prefer this process's own high-water mark
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+"""
+
+CHILD_EPILOGUE = """
+loaded = time.perf_counter()
+first_query_ms = None
+if model is not None:
+    model.get_recommendations({'country': 'uk', 'duration': 7, 'month': 'june', 'interests': ['cultural']}, 10)
+    first_query_ms = (time.perf_counter() - loaded) * 1000
+print(json.dumps({
+    'import_and_load_ms': (loaded - start) * 1000,
+    'first_query_ms': first_query_ms,
+    'max_rss_kb': peak_rss_kb(),
+    'pandas': 'pandas' in sys.modules,
+    'sklearn': 'sklearn' in sys.modules
+}))
+"""
+
+TARGETS = {
+    'serving runtime': """
+from serving import RecommendationRuntime
+model = RecommendationRuntime()
+assert model.load_runtime({runtime_path!r})
+""",
+    'full model': """
+from model import TravelRecommendationModel
+model = TravelRecommendationModel()
+assert model.load_model({model_path!r})
+""",
+    'api (import only)': """
+import main
+model = None
+"""
+}
+
+
+def parse_importtime(stderr: str):
+    """Return (total import microseconds, [(cumulative us, package)] for second-level imports)"""
+    total = 0
+    second_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level under the module that imported them
+        depth = (len(package) - len(package.lstrip()) - 1) // 2
+        if depth == 0:
+            total += int(cumulative)
+        elif depth == 1:
+            second_level.append((int(cumulative), package.strip()))
+    return total, second_level
+
+
+def run_target(code: str):
+    """Run one child interpreter with -X importtime and return its report"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['import_us'], report['imports'] = parse_importtime(result.stderr)
+    return report
+
+
+def build_artifacts(dataset: str, directory: str):
+    """Preprocess the dataset and save it as a model pickle and a runtime archive"""
+    from model import TravelRecommendationModel
+
+    model = TravelRecommendationModel()
+    if not model.load_data(dataset):
+        raise SystemExit(f"Could not load {dataset}")
+    model.preprocess_data()
+    model_path = os.path.join(directory, 'model.pkl')
+    runtime_path = os.path.join(directory, 'runtime.npz')
+    model.save_model(model_path)
+    model.save_runtime(runtime_path)
+    return model_path, runtime_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of serving vs build import paths")
+    parser.add_argument("--dataset", default="SRI_LANKA_TOUR_DATASET.xlsx")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest imports to list per target")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_path, runtime_path = build_artifacts(args.dataset, directory)
+        print(f"Artifacts: model pickle {os.path.getsize(model_path) / 1024:.0f} KB, "
+              f"runtime archive {os.path.getsize(runtime_path) / 1024:.0f} KB\n")
+
+        print(f"{'target':<20} {'imports ms':>11} {'import+load ms':>15} {'1st query ms':>13} "
+              f"{'max RSS MB':>11} {'pandas':>7} {'sklearn':>8}")
+        slowest = {}
+        for name, body in TARGETS.items():
+            code = CHILD_PREAMBLE + body.format(model_path=model_path, runtime_path=runtime_path) + CHILD_EPILOGUE
+            reports = [run_target(code) for _ in range(args.runs)]
+            first_query = [r['first_query_ms'] for r in reports if r['first_query_ms'] is not None]
+            print(f"{name:<20} {statistics.median(r['import_us'] for r in reports) / 1000:>11.1f} "
+                  f"{statistics.median(r['import_and_load_ms'] for r in reports):>15.1f} "
+                  f"{(statistics.median(first_query) if first_query else float('nan')):>13.2f} "
+                  f"{statistics.median(r['max_rss_kb'] for r in reports) / 1024:>11.1f} "
+                  f"{str(reports[-1]['pandas']):>7} {str(reports[-1]['sklearn']):>8}")
+            slowest[name] = sorted(reports[-1]['imports'], reverse=True)[:args.top]
+
+    for name, imports in slowest.items():
+        print(f"\nHeaviest imports, {name}:")
+        for us, package in imports:
+            print(f"  {us / 1000:>8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# build_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when preprocess_data changes in a way that invalidates cached builds
+BUILD_VERSION = 2
+
+
+def file_sha256(file_path: str) -> str:
+    """Content hash of a dataset file"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_key(dataset_sha256: str, config: Dict[str, Any]) -> str:
+    """Content hash of the dataset file plus the build configuration"""
+    digest = hashlib.sha256(dataset_sha256.encode())
+    digest.update(json.dumps(dict(config, build_version=BUILD_VERSION), sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Directory of preprocessed model artifacts keyed by build_key"""
+
+    def __init__(self, cache_dir: str = '.build_cache', max_entries: int = 8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def load(self, model, key: str) -> bool:
+        """Load the cached build for key into model; False if there is none"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return False
+        if not model.load_model(path):
+            logger.warning(f"Discarding unreadable cached build {path}")
+            os.remove(path)
+            return False
+        os.utime(path)  # Mark as recently used for pruning
+        return True
+
+    def store(self, model, key: str):
+        """Save model under key, atomically, and prune the oldest builds"""
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        model.save_model(tmp_path)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def _prune(self):
+        builds = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+        builds.sort(key=os.path.getmtime, reverse=True)
+        for path in builds[self.max_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_dataset_cached(model, file_path: str, cache: Optional[BuildCache] = None, force: bool = False) -> str:
+    """Load and preprocess file_path into model, reusing earlier builds of the same content.
+
+    Returns where the build came from: "memory" when the model already holds
+    it, "cache" when it was read from the build cache, or "built" when the
+    dataset was preprocessed. force skips both shortcuts and always builds.
+    Scoring weights set on the model are kept.
+    """
+    dataset_sha256 = file_sha256(file_path)
+    key = build_key(dataset_sha256, model.build_config())
+    if not force and model.build_key == key and model.df_processed is not None:
+        return "memory"
+
+    scoring_weights = dict(model.scoring_weights)
+    if not force and cache is not None and cache.load(model, key):
+        model.scoring_weights = scoring_weights
+        model.build_key = key
+        model.dataset_sha256 = dataset_sha256
+        return "cache"
+
+    if not model.load_data(file_path):
+        raise ValueError(f"Failed to load dataset: {file_path}")
+    model.preprocess_data()
+    if cache is not None:
+        cache.store(model, key)
+    model.build_key = key
+    model.dataset_sha256 = dataset_sha256
+    return "built"
+
+
+class DatasetWatcher:
+    """Polls a dataset file and calls on_change once it has changed and stopped changing"""
+
+    def __init__(self, file_path: str, on_change: Callable[[str], None], interval: float = 2.0):
+        self.file_path = file_path
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dataset-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.file_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _run(self):
+        last = self._signature()
+        pending = None
+        while not self._stop.wait(self.interval):
+            current = self._signature()
+            if current is None or current == last:
+                continue
+            # Wait one more interval so a file still being written is not read half-way
+            if current != pending:
+                pending = current
+                continue
+            last, pending = current, None
+            try:
+                self.on_change(self.file_path)
+            except Exception as e:
+                logger.error(f"Error rebuilding after change to {self.file_path}: {e}")
@@ -0,0 +1,330 @@
+# load_test.py
+"""Traffic replay load test for the recommendation API.
+
+Replays a recorded JSONL trace, or a synthetic mix of /recommend,
+/quick-recommend and the data exploration endpoints, either in-process
+through ASGI or against a running server. Reports throughput, latency
+percentiles and error rates per endpoint. A /load-dataset or /load-model
+call can be injected mid-run to measure the impact of a reload on live
+traffic.
+
+Trace lines look like:
+    {"t": 0.012, "method": "POST", "path": "/recommend", "json": {...}}
+    {"t": 0.020, "method": "GET", "path": "/countries"}
+"t" is the offset in seconds from the start of the trace and is only used
+with --replay-timing; otherwise requests are sent as fast as the
+concurrency and --rate allow.
+
+Usage:
+    python load_test.py --in-process --duration 20 --concurrency 32 --inject /load-dataset --inject-at 10
+    python load_test.py --url http://localhost:8000 --rate 200 --duration 30 --record-trace trace.jsonl
+    python load_test.py --url http://localhost:8000 --trace trace.jsonl --replay-timing
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Default synthetic traffic mix by request kind
+DEFAULT_MIX = {"recommend": 0.6, "quick": 0.2, "page": 0.05, "explore": 0.15}
+
+EXPLORE_PATHS = ["/countries", "/interests", "/locations", "/overnight-stays"]
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """Parse "recommend=0.7,quick=0.2,explore=0.1" into normalized weights"""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in spec.split(","):
+        kind, weight = item.split("=", 1)
+        if kind.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown request kind: {kind}. Use one of: {', '.join(DEFAULT_MIX)}")
+        mix[kind.strip()] = float(weight)
+    total = sum(mix.values())
+    return {kind: weight / total for kind, weight in mix.items()}
+
+
+class SyntheticTraffic:
+    """Generates requests from the values the target itself reports"""
+
+    def __init__(self, vocabulary: Dict[str, List[str]], mix: Dict[str, float], seed: int = 42):
+        self.vocabulary = vocabulary
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.rng = random.Random(seed)
+
+    def _preferences(self) -> Dict[str, Any]:
+        rng, vocab = self.rng, self.vocabulary
+        return {
+            "country": rng.choice(vocab["countries"]),
+            "duration": rng.randint(1, 14),
+            "month": rng.choice(vocab["months"]),
+            "budget_level": rng.choice(["low", "medium", "high"]),
+            "interests": rng.sample(vocab["interests"], min(len(vocab["interests"]), rng.randint(1, 3))),
+            "overnight_stay": rng.choice(vocab["overnight_stays"] + [""])
+        }
+
+    def next_request(self) -> Dict[str, Any]:
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "recommend":
+            return {"method": "POST", "path": "/recommend",
+                    "json": {"preferences": self._preferences(), "top_k": self.rng.choice([5, 10, 20]),
+                             "diverse": self.rng.random() < 0.5}}
+        if kind == "page":
+            return {"method": "POST", "path": "/recommend/page",
+                    "json": {"preferences": self._preferences(), "page_size": 20}}
+        if kind == "quick":
+            prefs = self._preferences()
+            return {"method": "POST", "path": "/quick-recommend",
+                    "params": {"country": prefs["country"], "duration": prefs["duration"], "month": prefs["month"],
+                               "budget_level": prefs["budget_level"], "interests": ",".join(prefs["interests"]),
+                               "overnight_stay": prefs["overnight_stay"]}}
+        return {"method": "GET", "path": self.rng.choice(EXPLORE_PATHS)}
+
+
+async def fetch_vocabulary(client: httpx.AsyncClient) -> Dict[str, List[str]]:
+    """Values for synthetic preferences, taken from the exploration endpoints"""
+    vocabulary = {"countries": ["sri lanka"], "interests": ["cultural", "adventure", "wildlife"],
+                  "overnight_stays": ["hotel"], "months": ["january", "february", "march", "april", "may", "june",
+                                                           "july", "august", "september", "october",
+                                                           "november", "december"]}
+    for key, path in (("countries", "/countries"), ("interests", "/interests"),
+                      ("overnight_stays", "/overnight-stays")):
+        try:
+            response = await client.get(path)
+            if response.status_code == 200 and response.json().get(key):
+                vocabulary[key] = response.json()[key]
+        except httpx.HTTPError:
+            pass
+    return vocabulary
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class LoadRunner:
+    """Sends requests with bounded concurrency and records one sample per request"""
+
+    def __init__(self, client: httpx.AsyncClient, concurrency: int, rate: Optional[float], seed: int = 42):
+        self.client = client
+        self.concurrency = concurrency
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.samples: List[Dict[str, Any]] = []
+        self.recorded: List[Dict[str, Any]] = []
+        self.start = 0.0
+
+    async def send(self, request: Dict[str, Any], issued: float):
+        """Send one request; latency counts from when it was issued, including time queued in the client"""
+        status, error = None, None
+        try:
+            response = await self.client.request(request["method"], request["path"], json=request.get("json"),
+                                                 params=request.get("params"))
+            status = response.status_code
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+        self.samples.append({"path": request["path"], "start": issued - self.start, "end": finished - self.start,
+                             "latency_ms": (finished - issued) * 1000, "status": status, "error": error})
+
+    async def run(self, next_request, duration: float, max_requests: Optional[int] = None,
+                  timed: bool = False, injections: Optional[List[Dict[str, Any]]] = None):
+        """Drive traffic until duration elapses or next_request returns None"""
+        self.start = time.perf_counter()
+        deadline = self.start + duration
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        injection_tasks = [asyncio.create_task(self._inject(item)) for item in injections or []]
+        next_arrival = self.start
+        sent = 0
+
+        async def guarded(request, issued):
+            try:
+                await self.send(request, issued)
+            finally:
+                semaphore.release()
+
+        while time.perf_counter() < deadline and (max_requests is None or sent < max_requests):
+            request = next_request()
+            if request is None:
+                break
+
+            # Open-loop requests are timed from their scheduled arrival, so a stalled
+            # server or event loop shows up as latency instead of fewer requests
+            scheduled = None
+            if timed and "t" in request:
+                scheduled = self.start + request["t"]
+            elif self.rate:
+                next_arrival += self.rng.expovariate(self.rate)
+                scheduled = next_arrival
+            if scheduled is not None and scheduled > time.perf_counter():
+                await asyncio.sleep(scheduled - time.perf_counter())
+
+            await semaphore.acquire()
+            issued = scheduled if scheduled is not None else time.perf_counter()
+            self.recorded.append(dict(request, t=round(issued - self.start, 6)))
+            task = asyncio.create_task(guarded(request, issued))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        await asyncio.gather(*injection_tasks)
+        return time.perf_counter() - self.start
+
+    async def _inject(self, item: Dict[str, Any]):
+        await asyncio.sleep(item["at"])
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(item["path"], params=item.get("params"), timeout=None)
+            item["status"] = response.status_code
+        except Exception as e:
+            item["status"] = type(e).__name__
+        item["start"] = started - self.start
+        item["end"] = time.perf_counter() - self.start
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Dict[str, float]]:
+    """Throughput, latency percentiles and error rate per endpoint plus an overall row"""
+    groups = defaultdict(list)
+    for sample in samples:
+        groups[sample["path"]].append(sample)
+        groups["ALL"].append(sample)
+
+    summary = {}
+    for path, group in groups.items():
+        latencies = np.array([sample["latency_ms"] for sample in group])
+        errors = sum(1 for sample in group if sample["error"] or sample["status"] >= 400)
+        summary[path] = {
+            "requests": len(group),
+            "throughput": len(group) / elapsed if elapsed else 0.0,
+            "p50": float(np.percentile(latencies, 50)),
+            "p90": float(np.percentile(latencies, 90)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+            "error_rate": errors / len(group)
+        }
+    return summary
+
+
+def print_summary(title: str, summary: Dict[str, Dict[str, float]]):
+    print(title)
+    print(f"  {'endpoint':<20} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'errors':>8}")
+    for path in sorted(summary, key=lambda p: (p == "ALL", p)):
+        row = summary[path]
+        print(f"  {path:<20} {row['requests']:>9} {row['throughput']:>9.1f} {row['p50']:>9.2f} {row['p90']:>9.2f} "
+              f"{row['p99']:>9.2f} {row['max']:>9.2f} {row['error_rate'] * 100:>7.1f}%")
+
+
+def print_reload_impact(samples: List[Dict[str, Any]], injections: List[Dict[str, Any]]):
+    """Compare traffic that overlapped each injected reload with traffic that did not"""
+    for item in injections:
+        if "start" not in item:
+            continue
+        during, outside = [], []
+        for s in samples:
+            overlaps = s["end"] >= item["start"] and s["start"] <= item["end"]
+            (during if overlaps else outside).append(s)
+        print(f"\nInjected {item['path']} at {item['start']:.2f}s: status {item['status']}, "
+              f"took {(item['end'] - item['start']) * 1000:.1f} ms")
+        for label, group in (("overlapping reload", during), ("outside reload", outside)):
+            if group:
+                window = max(s["end"] for s in group) - min(s["start"] for s in group)
+                print_summary(f"  {label}:", summarize(group, window))
+
+
+async def main_async(args):
+    if args.in_process:
+        import main as service
+
+        transport = httpx.ASGITransport(app=service.app)
+        base_url = "http://load-test"
+    else:
+        service, transport, base_url = None, None, args.url
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        if service is not None:
+            async with service.app.router.lifespan_context(service.app):
+                await run_load(client, args)
+        else:
+            await run_load(client, args)
+
+
+async def run_load(client: httpx.AsyncClient, args):
+    if args.load_dataset:
+        response = await client.post("/load-dataset", params={"file_path": args.load_dataset}, timeout=None)
+        print(f"Loaded dataset: {response.status_code}")
+
+    if args.trace:
+        trace = iter(load_trace(args.trace))
+        next_request = lambda: next(trace, None)
+    else:
+        traffic = SyntheticTraffic(await fetch_vocabulary(client), parse_mix(args.mix), args.seed)
+        next_request = traffic.next_request
+
+    injections = []
+    if args.inject:
+        # /load-model takes "filepath" rather than "file_path"
+        param = "filepath" if args.inject == "/load-model" else "file_path"
+        params = {param: args.inject_file} if args.inject_file else {}
+        if args.inject == "/load-dataset":
+            # Otherwise an unchanged dataset is served from memory and nothing is reloaded
+            params["force"] = "true"
+        injections = [{"path": args.inject, "at": at, "params": params} for at in args.inject_at]
+
+    runner = LoadRunner(client, args.concurrency, args.rate, args.seed)
+    elapsed = await runner.run(next_request, args.duration, args.requests, args.replay_timing, injections)
+
+    print_summary(f"Overall ({elapsed:.1f}s, concurrency {args.concurrency}"
+                  f"{f', rate {args.rate}/s' if args.rate else ''}):", summarize(runner.samples, elapsed))
+    print_reload_impact(runner.samples, injections)
+
+    if args.record_trace:
+        with open(args.record_trace, "w") as f:
+            for request in runner.recorded:
+                f.write(json.dumps(request) + "\n")
+        print(f"\nRecorded {len(runner.recorded)} requests to {args.record_trace}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay traffic against the recommendation API")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--in-process", action="store_true", help="Serve main.app in-process over ASGI")
+    target.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000")
+    parser.add_argument("--load-dataset", nargs="?", const="SRI_LANKA_TOUR_DATASET.xlsx",
+                        help="Call /load-dataset before the run (default file if no value given)")
+    parser.add_argument("--trace", help="JSONL trace to replay instead of synthetic traffic")
+    parser.add_argument("--replay-timing", action="store_true", help="Honour the trace's \"t\" offsets")
+    parser.add_argument("--record-trace", help="Write the requests that were sent to this JSONL file")
+    parser.add_argument("--mix", help="Synthetic mix, e.g. recommend=0.6,quick=0.2,page=0.05,explore=0.15")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/s (default: closed loop)")
+    parser.add_argument("--inject", choices=["/load-dataset", "/load-model"], help="Reload to inject during the run")
+    parser.add_argument("--inject-at", type=float, nargs="+", default=[5.0], help="Seconds into the run")
+    parser.add_argument("--inject-file", help="file_path/filepath parameter for the injected reload")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # One line per request from httpx would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# logging_config.py
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; structured fields come from ``extra={"fields": {...}}``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves all formatting to the background writer.
+
+    The stdlib QueueHandler formats the message and traceback on the calling
+    thread so records can be pickled; records here never leave the process, so
+    they are queued as-is. Callers must not mutate objects passed in a record.
+    """
+
+    def __init__(self, queue_: queue.Queue):
+        super().__init__(queue_)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # Drop instead of blocking or raising when the writer falls behind
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestSampler:
+    """Per-endpoint sampling of request-path log records"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: float = 1.0):
+        self.rates = rates or {}
+        self.default_rate = default_rate
+
+    def should_log(self, endpoint: str) -> bool:
+        """Decide whether to log this request; check it before building the record"""
+        rate = self.rates.get(endpoint, self.default_rate)
+        if rate >= 1.0:
+            return True
+        return rate > 0.0 and random.random() < rate
+
+
+class ErrorRateLimiter:
+    """Token bucket limiting how many error records (with tracebacks) are written"""
+
+    def __init__(self, rate_per_second: float = 5.0, burst: int = 20):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> Optional[int]:
+        """Return the number of errors suppressed since the last allowed one, or None if this one is suppressed"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return None
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+            return suppressed
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "/recommend=0.01,/quick-recommend=0.1" into a rate per endpoint"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            endpoint, rate = item.split("=", 1)
+            rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(level: int = logging.INFO, queue_size: int = 10000) -> QueueListener:
+    """Route root logging through a bounded in-memory queue to a background JSON writer.
+
+    When the queue is full new records are dropped rather than blocking the
+    request path. Returns the started listener; it is stopped at exit.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+
+    writer = logging.StreamHandler()
+    writer.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, writer, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,23 +1,50 @@
 # main.py
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional, Dict, Any
-import pandas as pd
 import logging
 import os
+import threading
 from datetime import datetime
 import uvicorn
-import traceback
 
-# Import your custom model class
-from model import TravelRecommendationModel
+# Serving runtime only; the pandas/scikit-learn build model is imported on demand by new_build_model
+from serving import RecommendationRuntime
+from sharding import SHARD_MANIFEST, ShardedRuntime, write_shards
+from package_index import PackageIndex, SORT_FIELDS, tokenize
+from ranking_cache import RankingCache, encode_cursor, decode_cursor
+from batching import RecommendationBatcher
+from build_cache import BuildCache, DatasetWatcher, load_dataset_cached
+from logging_config import setup_logging, RequestSampler, ErrorRateLimiter, parse_sample_rates
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: JSON records written by a background thread
+log_listener = setup_logging(level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO))
 logger = logging.getLogger(__name__)
 
+# Request-path log sampling, e.g. LOG_SAMPLE_RATES="/recommend=0.01,/recommend/page=0.1"
+request_sampler = RequestSampler(
+    rates=parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+    default_rate=float(os.getenv("LOG_SAMPLE_DEFAULT", "1.0"))
+)
+
+# Errors with tracebacks are rate limited so a failure storm cannot flood the log pipeline
+error_limiter = ErrorRateLimiter(
+    rate_per_second=float(os.getenv("LOG_ERROR_RATE", "5")),
+    burst=int(os.getenv("LOG_ERROR_BURST", "20"))
+)
+
+def log_error(message: str, exc: BaseException, **fields):
+    """Log an error with its traceback, subject to the error rate limit"""
+    suppressed = error_limiter.allow()
+    if suppressed is None:
+        return
+    if suppressed:
+        fields["suppressed_errors"] = suppressed
+    # The traceback is formatted by the background writer, not here
+    logger.error(message, exc_info=(type(exc), exc, exc.__traceback__), extra={"fields": fields})
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Travel Package Recommendation API",
@@ -48,8 +75,7 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unexpected error: {str(exc)}")
-    logger.error(traceback.format_exc())
+    log_error(f"Unexpected error: {str(exc)}", exc, endpoint=request.url.path)
     return JSONResponse(
         status_code=500,
         content={"detail": f"Internal server error: {str(exc)}"}
@@ -58,6 +84,59 @@ async def general_exception_handler(request: Request, exc: Exception):
 # Global model instance
 recommendation_model = None
 
+# Scoring backend for get_recommendations: "numpy" or "fused" (Numba, optional)
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "numpy")
+
+# Precision of model arrays and scores: "float64" or "float32"
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "float64")
+
+# Model artifact loaded at startup: a runtime archive (.npz, NumPy only), a sharded build
+# directory written by write_shards, or a full model pickle
+MODEL_ARTIFACT = os.getenv("MODEL_ARTIFACT", "")
+
+# Opt-in catalogue sharding: set SHARD_KEY to a column such as "Tourist country".
+# SHARD_WORKERS > 0 serves shards from that many worker processes; SHARD_MAX_LOADED > 0
+# caps how many shards stay in memory in this process.
+SHARD_KEY = os.getenv("SHARD_KEY", "")
+SHARD_DIR = os.getenv("SHARD_DIR", ".shards")
+SHARD_WORKERS = int(os.getenv("SHARD_WORKERS", "0"))
+SHARD_MAX_LOADED = int(os.getenv("SHARD_MAX_LOADED", "0"))
+
+# Preprocessed builds keyed by dataset content hash; set BUILD_CACHE_DIR="" to disable
+BUILD_CACHE_DIR = os.getenv("BUILD_CACHE_DIR", ".build_cache")
+build_cache = BuildCache(BUILD_CACHE_DIR) if BUILD_CACHE_DIR else None
+
+# Opt-in rebuild when the loaded dataset file changes: set DATASET_WATCH_INTERVAL > 0 (seconds)
+DATASET_WATCH_INTERVAL = float(os.getenv("DATASET_WATCH_INTERVAL", "0"))
+loaded_dataset_path = None
+dataset_watcher = None
+
+# Opt-in coalescing of concurrent /recommend calls: set RECOMMEND_BATCH_WINDOW_MS > 0 to enable
+RECOMMEND_BATCH_WINDOW_MS = float(os.getenv("RECOMMEND_BATCH_WINDOW_MS", "0"))
+RECOMMEND_BATCH_MAX_SIZE = int(os.getenv("RECOMMEND_BATCH_MAX_SIZE", "64"))
+
+recommendation_batcher = None
+if RECOMMEND_BATCH_WINDOW_MS > 0:
+    recommendation_batcher = RecommendationBatcher(
+        lambda preferences, top_k, diverse: recommendation_model.get_recommendations_batch(preferences, top_k, diverse),
+        window_ms=RECOMMEND_BATCH_WINDOW_MS,
+        max_batch_size=RECOMMEND_BATCH_MAX_SIZE
+    )
+
+# Cached full rankings for cursor pagination
+ranking_cache = RankingCache(
+    max_entries=int(os.getenv("RANKING_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("RANKING_CACHE_TTL", "600")),
+    max_bytes=int(os.getenv("RANKING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+)
+
+# Listing index for /packages, built on first use for the model snapshot it lists
+PACKAGES_MAX_PAGE_SIZE = int(os.getenv("PACKAGES_MAX_PAGE_SIZE", "500"))
+package_source = None
+package_index = None
+package_index_generation = None
+package_index_lock = threading.Lock()
+
 class UserPreferences(BaseModel):
     country: str = Field(..., description="Tourist country preference", min_length=1)
     duration: int = Field(7, ge=1, le=30, description="Trip duration in days")
@@ -95,10 +174,49 @@ class RecommendationResponse(BaseModel):
     interest_score: float
     overnight_score: float
 
+class RecommendationFilters(BaseModel):
+    countries: List[str] = Field(default_factory=list, description="Only packages for these tourist countries")
+    months: List[str] = Field(default_factory=list, description="Only packages in these months")
+    budget_levels: List[str] = Field(default_factory=list, description="Only packages with these budget levels")
+    locations: List[str] = Field(default_factory=list, description="Only packages visiting any of these locations")
+    overnight_stays: List[str] = Field(default_factory=list, description="Only packages with these overnight stays, as listed by /overnight-stays")
+    min_duration: Optional[int] = Field(None, ge=1, description="Minimum trip duration in days")
+    max_duration: Optional[int] = Field(None, ge=1, description="Maximum trip duration in days")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "budget_levels": ["low"],
+                "min_duration": 5,
+                "max_duration": 8
+            }
+        }
+
 class RecommendationRequest(BaseModel):
     preferences: UserPreferences
     top_k: Optional[int] = Field(10, ge=1, le=50, description="Number of recommendations")
     diverse: Optional[bool] = Field(True, description="Whether to apply diversity to recommendations")
+    filters: Optional[RecommendationFilters] = Field(None, description="Hard constraints applied before scoring")
+
+class RecommendationPageRequest(BaseModel):
+    preferences: Optional[UserPreferences] = Field(None, description="User preferences, required for the first page")
+    page_size: int = Field(10, ge=1, le=50, description="Number of recommendations per page")
+    diverse: Optional[bool] = Field(True, description="Whether to apply diversity to recommendations")
+    filters: Optional[RecommendationFilters] = Field(None, description="Hard constraints applied before scoring")
+    cursor: Optional[str] = Field(None, description="Cursor from a previous page; preferences and filters are ignored when set")
+
+class RecommendationPage(BaseModel):
+    items: List[RecommendationResponse]
+    total: int
+    next_cursor: Optional[str] = None
+
+class PackagePage(BaseModel):
+    items: List[Dict[str, Any]]
+    total: int
+    page: int
+    page_size: int
+    sort: str
+    order: str
 
 class ModelStatus(BaseModel):
     status: str
@@ -106,12 +224,126 @@ class ModelStatus(BaseModel):
     dataset_size: Optional[int] = None
     last_updated: Optional[str] = None
 
+def preferences_to_dict(preferences: UserPreferences) -> Dict[str, Any]:
+    """Normalize request preferences into the dictionary the model expects"""
+    return {
+        "country": preferences.country.lower().strip(),
+        "duration": preferences.duration,
+        "month": preferences.month.lower().strip(), 
+        "budget_level": preferences.budget_level.lower().strip(),
+        "interests": [interest.lower().strip() for interest in preferences.interests],
+        "overnight_stay": (preferences.overnight_stay or "").lower().strip()
+    }
+
+def format_recommendations(recommendations: List[Dict]) -> List[RecommendationResponse]:
+    """Convert model recommendation entries into response objects"""
+    response = []
+    for rec in recommendations:
+        try:
+            explanation = recommendation_model.explain_recommendation(rec)
+            response.append(RecommendationResponse(
+                index=rec['index'],
+                score=round(rec['score'], 3),
+                country=rec['country'],
+                month=rec['month'],
+                duration=int(rec['duration']),
+                budget=rec['budget'],
+                location=rec['location'],
+                interests=rec['interests'],
+                activities=rec['activities'],
+                overnight_stay=rec['overnight_stay'],
+                explanation=explanation,
+                duration_score=round(rec['duration_score'], 3),
+                budget_score=round(rec['budget_score'], 3),
+                interest_score=round(rec['interest_score'], 3),
+                overnight_score=round(rec.get('overnight_score', 0.0), 3)
+            ))
+        except Exception as e:
+            log_error(f"Error processing recommendation {rec.get('index', 'unknown')}: {str(e)}", e)
+            continue
+    return response
+
+def new_build_model():
+    """Create a model that can load and preprocess datasets, keeping the current scoring weights"""
+    # Deferred so serving from a runtime artifact never imports pandas or scikit-learn
+    from model import TravelRecommendationModel
+    
+    model = TravelRecommendationModel(scoring_backend=SCORING_BACKEND, precision=MODEL_PRECISION)
+    if recommendation_model is not None:
+        model.scoring_weights = dict(recommendation_model.scoring_weights)
+    return model
+
+def open_shards(directory: str) -> ShardedRuntime:
+    """Open a sharded build with the configured backend, precision and residency"""
+    return ShardedRuntime(directory, scoring_backend=SCORING_BACKEND, precision=MODEL_PRECISION,
+                          workers=SHARD_WORKERS, max_loaded=SHARD_MAX_LOADED)
+
+def serve_model(model):
+    """Make model the one answering requests, sharding it first when SHARD_KEY is set"""
+    global recommendation_model, package_source, package_index, package_index_generation
+    
+    # Only an unsharded build model is listed: runtime and shard artifacts hold normalized values,
+    # which the admin grid would write back, and a sharded server must not hold the whole catalogue
+    listed = model.is_loaded and getattr(model, 'df', None) is not None and not SHARD_KEY
+    with package_index_lock:
+        package_source = model if listed else None
+        if package_source is None or package_index_generation != model.generation:
+            package_index, package_index_generation = None, None
+    
+    if SHARD_KEY and model.is_loaded and not isinstance(model, ShardedRuntime):
+        model = open_shards(write_shards(model, SHARD_DIR, SHARD_KEY))
+    
+    previous, recommendation_model = recommendation_model, model
+    if isinstance(previous, ShardedRuntime) and previous is not model:
+        previous.close()
+
+def get_package_index(source) -> Optional[PackageIndex]:
+    """Listing index of source (package_source), built on first use; None when nothing is listed"""
+    global package_index, package_index_generation
+    
+    if source is None:
+        return None
+    with package_index_lock:
+        if package_index_generation != source.generation:
+            package_index, package_index_generation = PackageIndex(*source.package_fields()), source.generation
+        return package_index
+
+def rebuild_dataset(file_path: str):
+    """Rebuild a changed dataset in the background and swap it in if it is still being served"""
+    model = new_build_model()
+    build_source = load_dataset_cached(model, file_path, build_cache)
+    
+    if loaded_dataset_path == file_path:
+        serve_model(model)
+    logger.info(f"Rebuilt dataset {file_path} after change ({build_source})")
+
+def watch_dataset(file_path: str):
+    """Point the dataset watcher at the most recently loaded dataset"""
+    global loaded_dataset_path, dataset_watcher
+    
+    loaded_dataset_path = file_path
+    if DATASET_WATCH_INTERVAL <= 0 or (dataset_watcher is not None and dataset_watcher.file_path == file_path):
+        return
+    if dataset_watcher is not None:
+        dataset_watcher.stop()
+    dataset_watcher = DatasetWatcher(file_path, rebuild_dataset, interval=DATASET_WATCH_INTERVAL)
+    dataset_watcher.start()
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the model on startup"""
     global recommendation_model
     try:
-        recommendation_model = TravelRecommendationModel()
+        recommendation_model = RecommendationRuntime(scoring_backend=SCORING_BACKEND, precision=MODEL_PRECISION)
+        if os.path.isfile(os.path.join(MODEL_ARTIFACT, SHARD_MANIFEST)):
+            serve_model(open_shards(MODEL_ARTIFACT))
+        elif MODEL_ARTIFACT.endswith(".npz"):
+            if recommendation_model.load_runtime(MODEL_ARTIFACT):
+                serve_model(recommendation_model)
+        elif MODEL_ARTIFACT:
+            model = new_build_model()
+            if model.load_model(MODEL_ARTIFACT):
+                serve_model(model)
         logger.info("Travel Recommendation Model initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing model: {e}")
@@ -137,11 +369,11 @@ async def health_check():
             message="Model not initialized"
         )
     
-    if hasattr(recommendation_model, 'df_processed') and recommendation_model.df_processed is not None:
+    if recommendation_model.is_loaded:
         return ModelStatus(
             status="ready",
             message="Model is loaded and ready for recommendations",
-            dataset_size=len(recommendation_model.df_processed),
+            dataset_size=recommendation_model.dataset_size,
             last_updated=datetime.now().isoformat()
         )
     else:
@@ -157,8 +389,8 @@ async def test_request(request: dict):
     return {"received_data": request, "status": "success"}
 
 @app.post("/load-dataset", tags=["Model Management"])
-async def load_dataset(file_path: str = "SRI_LANKA_TOUR_DATASET.xlsx"):
-    """Load and preprocess the travel dataset"""
+async def load_dataset(file_path: str = "SRI_LANKA_TOUR_DATASET.xlsx", force: bool = False):
+    """Load and preprocess the travel dataset; force rebuilds even if the file is unchanged"""
     global recommendation_model
     
     if recommendation_model is None:
@@ -168,18 +400,19 @@ async def load_dataset(file_path: str = "SRI_LANKA_TOUR_DATASET.xlsx"):
         raise HTTPException(status_code=404, detail=f"Dataset file not found: {file_path}")
     
     try:
-        # Load data
-        success = recommendation_model.load_data(file_path)
-        if not success:
-            raise HTTPException(status_code=500, detail="Failed to load dataset")
+        # A runtime loaded from an artifact or shards cannot preprocess, so build into a new model
+        model = recommendation_model if hasattr(recommendation_model, 'preprocess_data') else new_build_model()
         
-        # Preprocess data
-        recommendation_model.preprocess_data()
+        # Load and preprocess, or reuse a build of the same file content
+        build_source = load_dataset_cached(model, file_path, build_cache, force=force)
+        serve_model(model)
+        watch_dataset(file_path)
         
         return {
             "message": "Dataset loaded and preprocessed successfully",
-            "dataset_size": len(recommendation_model.df),
-            "processed_features": len(recommendation_model.feature_columns),
+            "dataset_size": model.dataset_size,
+            "processed_features": len(model.feature_columns),
+            "build": build_source,
             "timestamp": datetime.now().isoformat()
         }
     
@@ -190,76 +423,115 @@ async def load_dataset(file_path: str = "SRI_LANKA_TOUR_DATASET.xlsx"):
 @app.post("/recommend", response_model=List[RecommendationResponse], tags=["Recommendations"])
 async def get_recommendations(request: RecommendationRequest):
     """Get travel package recommendations based on user preferences"""
+    return await recommend(request, "/recommend")
+
+async def recommend(request: RecommendationRequest, endpoint: str):
+    """Score a recommendation request, sampling its log records under endpoint"""
     global recommendation_model
     
     try:
         if recommendation_model is None:
             raise HTTPException(status_code=500, detail="Model not initialized")
         
-        if not hasattr(recommendation_model, 'df_processed') or recommendation_model.df_processed is None:
+        if not recommendation_model.is_loaded:
             raise HTTPException(status_code=400, detail="Dataset not loaded. Please load dataset first using /load-dataset endpoint")
         
-        # Log the incoming request for debugging
-        logger.info(f"Received recommendation request: {request.dict()}")
+        # Decide up front so unsampled requests never build their log record
+        log_request = request_sampler.should_log(endpoint)
         
         # Convert preferences to dictionary
-        user_prefs = {
-            "country": request.preferences.country.lower().strip(),
-            "duration": request.preferences.duration,
-            "month": request.preferences.month.lower().strip(), 
-            "budget_level": request.preferences.budget_level.lower().strip(),
-            "interests": [interest.lower().strip() for interest in request.preferences.interests],
-            "overnight_stay": (request.preferences.overnight_stay or "").lower().strip()
-        }
+        user_prefs = preferences_to_dict(request.preferences)
         
-        logger.info(f"Processed user preferences: {user_prefs}")
+        filters = request.filters.dict(exclude_none=True) if request.filters else None
+        
+        if log_request:
+            logger.info("Received recommendation request", extra={"fields": {
+                "endpoint": endpoint, "request": request.dict(), "preferences": user_prefs
+            }})
         
         # Get recommendations
-        if request.diverse:
-            recommendations = recommendation_model.get_diverse_recommendations(user_prefs, request.top_k)
+        if recommendation_batcher is not None and filters is None:
+            recommendations = await recommendation_batcher.submit(user_prefs, request.top_k, bool(request.diverse))
+        elif request.diverse:
+            recommendations = recommendation_model.get_diverse_recommendations(user_prefs, request.top_k, filters)
         else:
-            recommendations = recommendation_model.get_recommendations(user_prefs, request.top_k)
+            recommendations = recommendation_model.get_recommendations(user_prefs, request.top_k, filters)
         
         if not recommendations:
-            logger.warning("No recommendations found for the given preferences")
+            if log_request:
+                logger.warning("No recommendations found for the given preferences", extra={"fields": {"endpoint": endpoint}})
             return []
         
         # Format response
-        response = []
-        for rec in recommendations:
-            try:
-                explanation = recommendation_model.explain_recommendation(rec)
-                response.append(RecommendationResponse(
-                    index=rec['index'],
-                    score=round(rec['score'], 3),
-                    country=rec['country'],
-                    month=rec['month'],
-                    duration=int(rec['duration']),
-                    budget=rec['budget'],
-                    location=rec['location'],
-                    interests=rec['interests'],
-                    activities=rec['activities'],
-                    overnight_stay=rec['overnight_stay'],
-                    explanation=explanation,
-                    duration_score=round(rec['duration_score'], 3),
-                    budget_score=round(rec['budget_score'], 3),
-                    interest_score=round(rec['interest_score'], 3),
-                    overnight_score=round(rec.get('overnight_score', 0.0), 3)
-                ))
-            except Exception as e:
-                logger.error(f"Error processing recommendation {rec.get('index', 'unknown')}: {str(e)}")
-                continue
+        response = format_recommendations(recommendations)
         
-        logger.info(f"Generated {len(response)} recommendations for user preferences")
+        if log_request:
+            logger.info("Generated recommendations", extra={"fields": {"endpoint": endpoint, "count": len(response)}})
         return response
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error generating recommendations: {str(e)}")
-        logger.error(traceback.format_exc())
+        log_error(f"Error generating recommendations: {str(e)}", e, endpoint=endpoint)
         raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
 
+@app.post("/recommend/page", response_model=RecommendationPage, tags=["Recommendations"])
+async def get_recommendation_page(request: RecommendationPageRequest):
+    """Page through the full ranking using opaque cursors.
+    
+    The first page ranks every matching package once and caches the ranking;
+    following pages only slice the cached ranking. Cursors expire when the
+    cache evicts them or when the model is reloaded.
+    """
+    global recommendation_model
+    
+    if recommendation_model is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+    
+    if not recommendation_model.is_loaded:
+        raise HTTPException(status_code=400, detail="Dataset not loaded. Please load dataset first using /load-dataset endpoint")
+    
+    generation = recommendation_model.generation
+    log_request = request_sampler.should_log("/recommend/page")
+    
+    if request.cursor:
+        try:
+            key, offset, cursor_generation = decode_cursor(request.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        ranking = ranking_cache.get(key, generation) if cursor_generation == generation else None
+        if ranking is None:
+            raise HTTPException(status_code=410, detail="Cursor expired. Please request the first page again")
+    else:
+        if request.preferences is None:
+            raise HTTPException(status_code=422, detail="Preferences are required when no cursor is given")
+        
+        user_prefs = preferences_to_dict(request.preferences)
+        filters = request.filters.dict(exclude_none=True) if request.filters else None
+        
+        try:
+            ranking = recommendation_model.rank_packages(user_prefs, filters, diverse=bool(request.diverse))
+        except Exception as e:
+            log_error(f"Error ranking packages: {str(e)}", e, endpoint="/recommend/page")
+            raise HTTPException(status_code=500, detail=f"Error generating recommendations: {str(e)}")
+        key = ranking_cache.put(ranking, generation)
+        offset = 0
+    
+    total = len(ranking['scores'])
+    stop = offset + request.page_size
+    items = format_recommendations(recommendation_model.recommendations_from_ranking(ranking, offset, stop))
+    
+    if log_request:
+        logger.info("Served recommendation page", extra={"fields": {
+            "endpoint": "/recommend/page", "offset": offset, "count": len(items), "total": total
+        }})
+    
+    return RecommendationPage(
+        items=items,
+        total=total,
+        next_cursor=encode_cursor(key, stop, generation) if stop < total else None
+    )
+
 @app.post("/quick-recommend", tags=["Recommendations"])
 async def quick_recommend(
     country: str,
@@ -282,18 +554,18 @@ async def quick_recommend(
     )
     
     request = RecommendationRequest(preferences=preferences, top_k=5)
-    return await get_recommendations(request)
+    return await recommend(request, "/quick-recommend")
 
 @app.get("/countries", tags=["Data Exploration"])
 async def get_available_countries():
     """Get list of available tourist countries in the dataset"""
     global recommendation_model
     
-    if recommendation_model is None or not hasattr(recommendation_model, 'df_processed'):
+    if recommendation_model is None or not recommendation_model.is_loaded:
         raise HTTPException(status_code=400, detail="Dataset not loaded")
     
     try:
-        countries = recommendation_model.df_processed['Tourist_country'].unique().tolist()
+        countries = recommendation_model.column_values['Tourist country'].tolist()
         countries = [country for country in countries if country and country.strip()]
         return {"countries": sorted(countries)}
     except Exception as e:
@@ -304,12 +576,12 @@ async def get_available_interests():
     """Get list of available interests/activities in the dataset"""
     global recommendation_model
     
-    if recommendation_model is None or not hasattr(recommendation_model, 'df_processed'):
+    if recommendation_model is None or not recommendation_model.is_loaded:
         raise HTTPException(status_code=400, detail="Dataset not loaded")
     
     try:
         interests_set = set()
-        for interest_str in recommendation_model.df_processed['Interest'].dropna():
+        for interest_str in recommendation_model.column_values['Interest']:
             if interest_str and interest_str.strip():
                 # Split by common delimiters and clean
                 interests = [i.strip().lower() for i in interest_str.split(',')]
@@ -325,11 +597,11 @@ async def get_available_locations():
     """Get list of available locations in the dataset"""
     global recommendation_model
     
-    if recommendation_model is None or not hasattr(recommendation_model, 'df_processed'):
+    if recommendation_model is None or not recommendation_model.is_loaded:
         raise HTTPException(status_code=400, detail="Dataset not loaded")
     
     try:
-        locations = recommendation_model.df_processed['Location'].unique().tolist()
+        locations = recommendation_model.column_values['Location'].tolist()
         locations = [loc for loc in locations if loc and loc.strip()]
         return {"locations": sorted(locations)}
     except Exception as e:
@@ -343,9 +615,12 @@ async def save_model(filepath: str = "travel_recommendation_model.pkl"):
     if recommendation_model is None:
         raise HTTPException(status_code=500, detail="Model not initialized")
     
-    if not hasattr(recommendation_model, 'df_processed') or recommendation_model.df_processed is None:
+    if not recommendation_model.is_loaded:
         raise HTTPException(status_code=400, detail="No model to save. Please load and process dataset first.")
     
+    if not hasattr(recommendation_model, 'save_model'):
+        raise HTTPException(status_code=400, detail="Model was loaded from a runtime artifact; use /save-runtime instead.")
+    
     try:
         recommendation_model.save_model(filepath)
         return {
@@ -360,18 +635,18 @@ async def load_model(filepath: str = "travel_recommendation_model.pkl"):
     """Load a pre-trained model from disk"""
     global recommendation_model
     
-    if recommendation_model is None:
-        recommendation_model = TravelRecommendationModel()
+    model = recommendation_model if hasattr(recommendation_model, 'load_model') else new_build_model()
     
     if not os.path.exists(filepath):
         raise HTTPException(status_code=404, detail=f"Model file not found: {filepath}")
     
     try:
-        success = recommendation_model.load_model(filepath)
+        success = model.load_model(filepath)
         if success:
+            serve_model(model)
             return {
                 "message": f"Model loaded successfully from {filepath}",
-                "dataset_size": len(recommendation_model.df_processed) if hasattr(recommendation_model, 'df_processed') else 0,
+                "dataset_size": model.dataset_size,
                 "timestamp": datetime.now().isoformat()
             }
         else:
@@ -379,16 +654,102 @@ async def load_model(filepath: str = "travel_recommendation_model.pkl"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading model: {str(e)}")
 
+@app.post("/save-runtime", tags=["Model Management"])
+async def save_runtime(filepath: str = "travel_recommendation_runtime.npz"):
+    """Save the serving runtime (NumPy only, no pickle) to disk"""
+    global recommendation_model
+    
+    if recommendation_model is None:
+        raise HTTPException(status_code=500, detail="Model not initialized")
+    
+    if not recommendation_model.is_loaded:
+        raise HTTPException(status_code=400, detail="No model to save. Please load and process dataset first.")
+    
+    if not hasattr(recommendation_model, 'save_runtime'):
+        raise HTTPException(status_code=400, detail=f"Sharded model is already saved in {recommendation_model.directory}")
+    
+    try:
+        recommendation_model.save_runtime(filepath)
+        return {
+            "message": f"Runtime saved successfully to {filepath}",
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving runtime: {str(e)}")
+
+@app.post("/load-runtime", tags=["Model Management"])
+async def load_runtime(filepath: str = "travel_recommendation_runtime.npz"):
+    """Load a serving runtime saved by /save-runtime, without the pandas/scikit-learn build stack"""
+    global recommendation_model
+    
+    if not os.path.exists(filepath):
+        raise HTTPException(status_code=404, detail=f"Runtime file not found: {filepath}")
+    
+    runtime = RecommendationRuntime(scoring_backend=SCORING_BACKEND, precision=MODEL_PRECISION)
+    if not runtime.load_runtime(filepath):
+        raise HTTPException(status_code=500, detail="Failed to load runtime")
+    
+    serve_model(runtime)
+    return {
+        "message": f"Runtime loaded successfully from {filepath}",
+        "dataset_size": recommendation_model.dataset_size,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/packages", response_model=PackagePage, tags=["Data Exploration"])
+async def list_packages(
+    request: Request,
+    response: Response,
+    page: int = 1,
+    page_size: int = 50,
+    sort: str = "id",
+    order: str = "asc",
+    q: str = ""
+):
+    """Paginated, sortable and searchable package listing for the admin data grid.
+    
+    Pages are sliced from sort orders precomputed for the loaded dataset, and q
+    matches word prefixes. The ETag only changes with the dataset or the query,
+    so an unchanged page revalidates with 304 Not Modified. X-Dataset-SHA256 is
+    the hash of the dataset file the listing was built from, so a client can
+    tell whether ids still match the rows of the file on disk.
+    """
+    if recommendation_model is None or not recommendation_model.is_loaded:
+        raise HTTPException(status_code=400, detail="Dataset not loaded")
+    source = package_source
+    index = get_package_index(source)
+    if index is None:
+        raise HTTPException(status_code=409, detail="The served model has no raw dataset rows; load the dataset with /load-dataset")
+    
+    if page < 1 or not 1 <= page_size <= PACKAGES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page must be >= 1 and page_size between 1 and {PACKAGES_MAX_PAGE_SIZE}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field: {sort}. Use one of: {', '.join(SORT_FIELDS)}")
+    
+    dataset_sha256 = source.dataset_sha256 or ""
+    etag = index.etag(page=page, page_size=page_size, sort=sort, order=order, q=" ".join(tokenize(q)),
+                      dataset=dataset_sha256)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Dataset-SHA256": dataset_sha256}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    total, rows = index.page(sort, order == "desc", q, (page - 1) * page_size, page_size)
+    response.headers.update(headers)
+    return PackagePage(items=index.records(rows), total=total, page=page, page_size=page_size, sort=sort, order=order)
+
 @app.get("/overnight-stays", tags=["Data Exploration"])
 async def get_available_overnight_stays():
     """Get list of available overnight stay types in the dataset"""
     global recommendation_model
     
-    if recommendation_model is None or not hasattr(recommendation_model, 'df_processed'):
+    if recommendation_model is None or not recommendation_model.is_loaded:
         raise HTTPException(status_code=400, detail="Dataset not loaded")
     
     try:
-        stays = recommendation_model.df_processed['Overnight_stay'].unique().tolist()
+        stays = recommendation_model.column_values['Overnight_stay'].tolist()
         stays = [stay for stay in stays if stay and stay.strip()]
         return {"overnight_stays": sorted(stays)}
     except Exception as e:
@@ -404,17 +765,28 @@ async def get_model_info():
     
     info = {
         "status": "initialized",
-        "has_data": hasattr(recommendation_model, 'df_processed') and recommendation_model.df_processed is not None
+        "has_data": recommendation_model.is_loaded
     }
     
     if info["has_data"]:
         info.update({
-            "dataset_size": len(recommendation_model.df_processed),
-            "feature_columns": len(recommendation_model.feature_columns),
-            "available_countries": len(recommendation_model.df_processed['Tourist_country'].unique()),
-            "available_locations": len(recommendation_model.df_processed['Location'].unique())
+            "dataset_size": recommendation_model.dataset_size,
+            "feature_columns": len(getattr(recommendation_model, 'feature_columns', [])),
+            "available_countries": len(recommendation_model.column_values['Tourist country']),
+            "available_locations": len(recommendation_model.column_values['Location'])
         })
     
+    if hasattr(recommendation_model, 'shard_info'):
+        info["sharding"] = recommendation_model.shard_info()
+    
+    if recommendation_batcher is not None:
+        info["batching"] = {
+            "window_ms": RECOMMEND_BATCH_WINDOW_MS,
+            "max_batch_size": RECOMMEND_BATCH_MAX_SIZE,
+            "batches": recommendation_batcher.batches,
+            "requests": recommendation_batcher.requests
+        }
+    
     return info
 
 if __name__ == "__main__":
@@ -4,18 +4,33 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestRegressor
 import pickle
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import warnings
 import random
+# Serving runtime and scoring constants; re-exported so existing imports from model keep working
+from serving import (RecommendationRuntime, CATALOGUE_COLUMNS, INDEXED_COLUMNS, FILTER_COLUMNS,
+                     SCORE_COMPONENTS, COMPONENT_COLUMNS, DEFAULT_SCORING_WEIGHTS, PRECISIONS)
 warnings.filterwarnings('ignore')
 
-class TravelRecommendationModel:
-    def __init__(self):
+def _display_value(value) -> str:
+    """Raw dataset cell as shown in the admin grid"""
+    if pd.isna(value):
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+class TravelRecommendationModel(RecommendationRuntime):
+    """Builds the serving runtime from a dataset: loading, preprocessing, persistence and evaluation"""
+    
+    def __init__(self, scoring_backend: str = 'numpy', precision: str = 'float64'):
+        super().__init__(scoring_backend=scoring_backend, precision=precision)
+        
         self.df = None
-        self.tfidf_vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        self.df_processed = None
+        self.tfidf_vectorizer = TfidfVectorizer(stop_words='english', max_features=1000, dtype=self.dtype)
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.content_similarity_matrix = None
@@ -46,6 +61,11 @@ class TravelRecommendationModel:
         # Create a copy for processing
         df_processed = self.df.copy()
         
+        # Start from a clean feature set so the dataset can be reprocessed
+        self.label_encoders = {}
+        self.feature_columns = []
+        self.build_key = None
+        
         # Handle missing values
         df_processed = df_processed.fillna('')
         
@@ -63,7 +83,7 @@ class TravelRecommendationModel:
         
         # Create TF-IDF matrix for content similarity
         tfidf_matrix = self.tfidf_vectorizer.fit_transform(text_features)
-        self.content_similarity_matrix = cosine_similarity(tfidf_matrix)
+        self.content_similarity_matrix = cosine_similarity(tfidf_matrix).astype(self.dtype, copy=False)
         
         # Encode categorical features
         categorical_cols = ['Tourist country', 'Month', 'Price USD', 'Location', 'Overnight_stay']
@@ -85,140 +105,53 @@ class TravelRecommendationModel:
         
         # Scale numerical features
         if self.feature_columns:
-            self.processed_features = self.scaler.fit_transform(df_processed[self.feature_columns])
+            self.processed_features = self.scaler.fit_transform(df_processed[self.feature_columns]).astype(self.dtype, copy=False)
         
         self.df_processed = df_processed
+        self._build_indexes()
         logging.info("Data preprocessing completed successfully")
     
-    def calculate_interest_match_score(self, user_interests: List[str], package_interests: str) -> float:
-        """Calculate how well package interests match user interests"""
-        if not package_interests:
-            return 0.0
+    def _build_indexes(self):
+        """Hand df_processed and the user-independent score terms to the serving runtime"""
+        df = self.df_processed
+        n_rows = len(df)
+        columns = {col: df[col].astype(str).to_numpy(dtype=object) for col in CATALOGUE_COLUMNS if col in df.columns}
         
-        package_interests = package_interests.lower()
-        user_interests = [interest.lower() for interest in user_interests]
+        if 'Duration_numeric' in df.columns:
+            duration_values = df['Duration_numeric'].to_numpy(dtype=self.dtype)
+        else:
+            duration_values = np.full(n_rows, 7.0, dtype=self.dtype)
         
-        matches = 0
-        for interest in user_interests:
-            if interest in package_interests:
-                matches += 1
+        # The content similarity bonus only depends on the package, so compute it once
+        content_scores = np.zeros(n_rows, dtype=self.dtype)
+        if self.content_similarity_matrix is not None and len(self.content_similarity_matrix):
+            n_similar = min(n_rows, len(self.content_similarity_matrix))
+            content_scores[:n_similar] = self.content_similarity_matrix[:n_similar].mean(axis=1)
         
-        return matches / len(user_interests) if user_interests else 0.0
+        self.set_catalogue(df.index.to_numpy(), columns, duration_values, content_scores)
     
-    def calculate_budget_score(self, user_budget: str, package_budget: str) -> float:
-        """Calculate budget compatibility score"""
-        budget_mapping = {'low': 1, 'medium': 2, 'high': 3}
-        user_budget_num = budget_mapping.get(user_budget.lower(), 2)
-        package_budget_num = budget_mapping.get(package_budget.lower(), 2)
-        
-        # Perfect match gets score 1.0, adjacent budgets get 0.7, distant get 0.3
-        if user_budget_num == package_budget_num:
-            return 1.0
-        elif abs(user_budget_num - package_budget_num) == 1:
-            return 0.7
-        else:
-            return 0.3
+    def build_config(self) -> Dict[str, Any]:
+        """Settings that change the output of preprocess_data"""
+        tfidf_params = self.tfidf_vectorizer.get_params()
+        return {
+            'precision': self.precision,
+            'tfidf_stop_words': tfidf_params['stop_words'],
+            'tfidf_max_features': tfidf_params['max_features']
+        }
     
-    def get_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10) -> List[Dict]:
-        """Generate travel package recommendations based on user preferences"""
-        if self.df_processed is None:
-            raise ValueError("Model not trained. Please preprocess data first.")
-        
-        recommendations = []
-        
-        # Extract user preferences
-        user_country = user_preferences.get('country', '').lower().strip()
-        user_duration = int(user_preferences.get('duration', 7))
-        user_month = user_preferences.get('month', '').lower().strip()
-        user_budget = user_preferences.get('budget_level', 'medium').lower().strip()
-        user_interests = [interest.lower().strip() for interest in user_preferences.get('interests', [])]
-        user_overnight = user_preferences.get('overnight_stay', '').lower().strip()  # New parameter
-        
-        # Calculate scores for each package
-        for idx, row in self.df_processed.iterrows():
-            score = 0.0
-            
-            # Country match (25% weight - reduced to accommodate overnight stay)
-            if row['Tourist country'] == user_country:
-                score += 0.25
-            
-            # Duration match (20% weight)
-            duration_diff = abs(row.get('Duration_numeric', 7) - user_duration)
-            duration_score = max(0, 1 - duration_diff / 10)  # Normalize duration difference
-            score += 0.2 * duration_score
-            
-            # Month match (15% weight)
-            if row['Month'] == user_month:
-                score += 0.15
-            
-            # Budget compatibility (15% weight)
-            budget_score = self.calculate_budget_score(user_budget, row['Price USD'])
-            score += 0.15 * budget_score
-            
-            # Interest match (15% weight - reduced)
-            interest_score = self.calculate_interest_match_score(user_interests, row.get('Interest', ''))
-            score += 0.15 * interest_score
-            
-            # Overnight stay preference match (10% weight - NEW)
-            overnight_score = 0.0
-            if user_overnight and row.get('Overnight_stay', ''):
-                if user_overnight in row['Overnight_stay'] or row['Overnight_stay'] in user_overnight:
-                    overnight_score = 1.0
-                elif len(user_overnight) > 0:  # Partial match bonus
-                    overnight_score = 0.3
-            elif not user_overnight:  # No preference specified, neutral score
-                overnight_score = 0.5
-            score += 0.1 * overnight_score
-            
-            # Content similarity bonus (using cosine similarity from TF-IDF)
-            if idx < len(self.content_similarity_matrix):
-                # Find packages with similar content
-                content_scores = self.content_similarity_matrix[idx]
-                avg_content_score = np.mean(content_scores)
-                score += 0.1 * avg_content_score
-            
-            # Create recommendation entry
-            recommendation = {
-                'index': idx,
-                'score': score,
-                'country': row['Tourist country'],
-                'month': row['Month'],
-                'duration': row.get('Duration_numeric', 7),
-                'budget': row['Price USD'],
-                'location': row.get('Location', ''),
-                'interests': row.get('Interest', ''),
-                'activities': row.get('Activities', ''),
-                'overnight_stay': row.get('Overnight_stay', ''),
-                'duration_score': duration_score,
-                'budget_score': budget_score,
-                'interest_score': interest_score,
-                'overnight_score': overnight_score
-            }
-            
-            recommendations.append(recommendation)
-        
-        # Sort by score and return top K
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:top_k]
+    def array_memory(self) -> Dict[str, int]:
+        """Bytes held by the model's numeric arrays, by name, including the build-only ones"""
+        memory = super().array_memory()
+        for name in ('processed_features', 'content_similarity_matrix'):
+            array = getattr(self, name)
+            if array is not None:
+                memory[name] = array.nbytes
+        return memory
     
-    def get_diverse_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10) -> List[Dict]:
-        """Get diverse recommendations to avoid similar packages"""
-        initial_recommendations = self.get_recommendations(user_preferences, top_k * 2)
-        
-        diverse_recommendations = []
-        seen_locations = set()
-        
-        for rec in initial_recommendations:
-            location = rec['location']
-            # Add some diversity by avoiding too many packages from same location
-            if location not in seen_locations or len(diverse_recommendations) < top_k // 2:
-                diverse_recommendations.append(rec)
-                seen_locations.add(location)
-                
-                if len(diverse_recommendations) >= top_k:
-                    break
-        
-        return diverse_recommendations
+    def package_fields(self):
+        """Package ids and field values for /packages, as written in the dataset"""
+        fields = {col: self.df[col].map(_display_value).to_numpy(dtype=object) for col in self.df.columns}
+        return self.df.index.to_numpy() + 1, fields
     
     def save_model(self, filepath: str):
         """Save the trained model"""
@@ -229,7 +162,11 @@ class TravelRecommendationModel:
             'content_similarity_matrix': self.content_similarity_matrix,
             'processed_features': self.processed_features,
             'feature_columns': self.feature_columns,
-            'df_processed': self.df_processed
+            'df': self.df,
+            'df_processed': self.df_processed,
+            'scoring_weights': self.scoring_weights,
+            'precision': self.precision,
+            'dataset_sha256': self.dataset_sha256
         }
         
         with open(filepath, 'wb') as f:
@@ -245,10 +182,16 @@ class TravelRecommendationModel:
             self.tfidf_vectorizer = model_data['tfidf_vectorizer']
             self.scaler = model_data['scaler']
             self.label_encoders = model_data['label_encoders']
-            self.content_similarity_matrix = model_data['content_similarity_matrix']
-            self.processed_features = model_data['processed_features']
+            # Arrays are converted to this model's precision, whatever the artifact was saved with
+            self.content_similarity_matrix = np.asarray(model_data['content_similarity_matrix'], dtype=self.dtype)
+            self.processed_features = np.asarray(model_data['processed_features'], dtype=self.dtype)
             self.feature_columns = model_data['feature_columns']
+            self.df = model_data.get('df')
             self.df_processed = model_data['df_processed']
+            self.scoring_weights = model_data.get('scoring_weights', dict(DEFAULT_SCORING_WEIGHTS))
+            self.build_key = None
+            self.dataset_sha256 = model_data.get('dataset_sha256')
+            self._build_indexes()
             
             logging.info(f"Model loaded from {filepath}")
             return True
@@ -256,30 +199,6 @@ class TravelRecommendationModel:
             logging.error(f"Error loading model: {e}")
             return False
     
-    def explain_recommendation(self, recommendation: Dict) -> str:
-        """Provide explanation for why a package was recommended"""
-        explanation = []
-        
-        if recommendation['score'] > 0.8:
-            explanation.append("Excellent match for your preferences!")
-        elif recommendation['score'] > 0.6:
-            explanation.append("Very good match for your preferences.")
-        elif recommendation['score'] > 0.4:
-            explanation.append("Good match with some of your preferences.")
-        else:
-            explanation.append("Partial match with your preferences.")
-        
-        if recommendation['duration_score'] > 0.8:
-            explanation.append(f"Duration ({recommendation['duration']} days) closely matches your preference.")
-        
-        if recommendation['budget_score'] > 0.7:
-            explanation.append("Budget level aligns well with your preference.")
-        
-        if recommendation['interest_score'] > 0.5:
-            explanation.append("Activities match several of your interests.")
-        
-        return " ".join(explanation)
-
     # ACCURACY EVALUATION METHODS START HERE
     
     def create_test_users(self, n_users=50):
@@ -302,7 +221,8 @@ class TravelRecommendationModel:
         for interest_str in df['Interest'].dropna():
             if isinstance(interest_str, str):
                 interests.extend([i.strip().lower() for i in interest_str.split(',')])
-        interests = list(set(interests))
+        # Sorted so sampling does not depend on string hash randomisation
+        interests = sorted(set(interests))
         
         random.seed(42)  # For reproducible results
         
@@ -0,0 +1,162 @@
+# package_index.py
+"""Read index behind /packages: paginated, sorted and searched package listings.
+
+Built once per served model snapshot. Every sortable field gets a precomputed
+order and its inverse (rank), so an unfiltered page is a slice of the order
+and a search result is sorted by rank without comparing values again. Search
+is word-prefix matching over a sorted token vocabulary with flat postings:
+each query word selects a contiguous vocabulary range, and words are ANDed.
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Record fields, named as in the dataset and the admin grid
+PACKAGE_FIELDS = ['Tourist country', 'Month', 'Duration', 'Price USD', 'Location', 'Interest', 'Activities',
+                  'Overnight_stay']
+
+# Fields whose words are indexed for prefix search
+SEARCH_FIELDS = ['Tourist country', 'Month', 'Location', 'Interest', 'Activities', 'Overnight_stay']
+
+SORT_FIELDS = ['id'] + PACKAGE_FIELDS
+
+MONTH_ORDER = {month: i for i, month in enumerate([
+    'january', 'february', 'march', 'april', 'may', 'june',
+    'july', 'august', 'september', 'october', 'november', 'december'
+])}
+PRICE_ORDER = {'low': 0, 'medium': 1, 'high': 2}
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of text, as indexed and as matched"""
+    return _WORD.findall(text.lower())
+
+
+def _number(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.inf
+
+
+def _group_rows(values: np.ndarray):
+    """Distinct values, each row's value code, and the rows of each value"""
+    distinct, codes = np.unique(values, return_inverse=True)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(distinct) + 1))
+    return distinct, codes, [order[bounds[i]:bounds[i + 1]] for i in range(len(distinct))]
+
+
+def _sort_order(name: str, distinct: np.ndarray, codes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Row order for a field: months by calendar, prices by level, durations numerically, others by text.
+
+    Keys are computed once per distinct value and gathered by code.
+    """
+    text = [value.lower().strip() for value in distinct]
+    if name == 'Duration':
+        primary = np.array([_number(value) for value in text])
+    elif name == 'Month':
+        primary = np.array([MONTH_ORDER.get(value, len(MONTH_ORDER)) for value in text])
+    elif name == 'Price USD':
+        primary = np.array([PRICE_ORDER.get(value, len(PRICE_ORDER)) for value in text])
+    else:
+        primary = np.zeros(len(text))
+    text_rank = np.unique(np.array(text, dtype=object), return_inverse=True)[1] if text else np.zeros(0, dtype=np.intp)
+    return np.lexsort((ids, text_rank[codes], primary[codes]))
+
+
+class PackageIndex:
+    """Package records of one model snapshot with sort orders and a word-prefix index"""
+
+    def __init__(self, ids: np.ndarray, fields: Dict[str, np.ndarray]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.fields = {name: np.asarray(fields.get(name, np.full(len(self.ids), '')), dtype=object)
+                       for name in PACKAGE_FIELDS}
+        n_rows = len(self.ids)
+        position_dtype = np.int32 if n_rows < np.iinfo(np.int32).max else np.int64
+
+        # Content hash, so ETags are stable across restarts and worker processes
+        digest = hashlib.sha256(self.ids.tobytes())
+        for name in PACKAGE_FIELDS:
+            digest.update('\x1f'.join(self.fields[name]).encode())
+        self.version = digest.hexdigest()[:16]
+
+        groups = {name: _group_rows(self.fields[name]) for name in PACKAGE_FIELDS}
+
+        self.sort_orders = {}
+        self.sort_ranks = {}
+        for name in SORT_FIELDS:
+            if name == 'id':
+                order = np.argsort(self.ids, kind='stable')
+            else:
+                distinct, codes, _ = groups[name]
+                order = _sort_order(name, distinct, codes, self.ids)
+            rank = np.empty(n_rows, dtype=position_dtype)
+            rank[order] = np.arange(n_rows, dtype=position_dtype)
+            self.sort_orders[name] = order.astype(position_dtype)
+            self.sort_ranks[name] = rank
+
+        # Sorted vocabulary with flat postings: rows of token t are token_rows[offsets[t]:offsets[t + 1]].
+        # Each distinct field value is tokenized once and contributes all of its rows.
+        postings: Dict[str, List[np.ndarray]] = {}
+        for name in SEARCH_FIELDS:
+            distinct, _, rows_by_value = groups[name]
+            for value, rows in zip(distinct, rows_by_value):
+                for word in set(tokenize(value)):
+                    postings.setdefault(word, []).append(rows)
+        self.vocabulary = np.array(sorted(postings), dtype=str)
+        token_rows = [np.unique(np.concatenate(postings[word])) for word in self.vocabulary]
+        self.token_offsets = np.concatenate([[0], np.cumsum([len(rows) for rows in token_rows])]).astype(np.int64)
+        self.token_rows = (np.concatenate(token_rows) if token_rows else np.zeros(0)).astype(position_dtype)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str) -> Optional[np.ndarray]:
+        """Rows where every query word is a prefix of some indexed word; None for an empty query"""
+        words = tokenize(query)
+        if not words:
+            return None
+        rows = None
+        # Longer prefixes select fewer tokens, so start with them
+        for word in sorted(set(words), key=len, reverse=True):
+            lo = np.searchsorted(self.vocabulary, word, side='left')
+            hi = np.searchsorted(self.vocabulary, word[:-1] + chr(ord(word[-1]) + 1), side='left')
+            matches = np.unique(self.token_rows[self.token_offsets[lo]:self.token_offsets[hi]])
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+            if len(rows) == 0:
+                break
+        return rows
+
+    def page(self, sort: str = 'id', descending: bool = False, query: str = '',
+             offset: int = 0, limit: int = 50) -> Tuple[int, np.ndarray]:
+        """Total matching rows and the row positions of one page"""
+        if sort not in self.sort_orders:
+            raise ValueError(f"Unknown sort field: {sort}. Use one of: {', '.join(SORT_FIELDS)}")
+        rows = self.search(query)
+        if rows is None:
+            order = self.sort_orders[sort]
+            total = len(order)
+            if descending:
+                order = order[::-1]
+            return total, order[offset:offset + limit]
+
+        rows = rows[np.argsort(self.sort_ranks[sort][rows], kind='stable')]
+        if descending:
+            rows = rows[::-1]
+        return len(rows), rows[offset:offset + limit]
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Package records for row positions, with their 1-based ids"""
+        return [dict({'id': int(self.ids[row])}, **{name: self.fields[name][row] for name in PACKAGE_FIELDS})
+                for row in rows]
+
+    def etag(self, **params) -> str:
+        """Strong ETag for one listing of this snapshot"""
+        request_hash = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        return f'"{self.version}-{request_hash}"'
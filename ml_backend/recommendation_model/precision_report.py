@@ -0,0 +1,113 @@
+# precision_report.py
+"""Validation report for the reduced-precision (float32) model mode.
+
+Builds the model in float64 and float32 from the same dataset, then compares
+top-k overlap for synthetic users, array memory and recommendation latency.
+Exits with status 1 when the mean overlap falls below --threshold.
+
+Usage:
+    python precision_report.py --dataset SRI_LANKA_TOUR_DATASET.xlsx --k 10 --threshold 0.95
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+from model import TravelRecommendationModel
+
+
+def build_model(dataset: str, precision: str, scoring_backend: str = 'numpy') -> TravelRecommendationModel:
+    model = TravelRecommendationModel(scoring_backend=scoring_backend, precision=precision)
+    if not model.load_data(dataset):
+        raise SystemExit(f"Could not load dataset from {dataset}")
+    model.preprocess_data()
+    return model
+
+
+def measure_latency(model: TravelRecommendationModel, users, k: int, repeats: int) -> np.ndarray:
+    """Per-query get_recommendations latency in ms"""
+    latencies = []
+    for _ in range(repeats):
+        for user in users:
+            start = time.perf_counter()
+            model.get_recommendations(user, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def compare_precision(dataset: str, n_users: int = 200, k: int = 10, repeats: int = 3,
+                      scoring_backend: str = 'numpy') -> Dict[str, Any]:
+    """Compare float32 against float64 on top-k overlap, memory and latency"""
+    reference = build_model(dataset, 'float64', scoring_backend)
+    reduced = build_model(dataset, 'float32', scoring_backend)
+    users = reference.create_test_users(n_users)
+
+    overlaps = []
+    max_score_error = 0.0
+    for user in users:
+        expected = reference.get_recommendations(user, k)
+        actual = reduced.get_recommendations(user, k)
+        expected_ids = {rec['index'] for rec in expected}
+        overlaps.append(len(expected_ids & {rec['index'] for rec in actual}) / max(len(expected), 1))
+        for a, b in zip(expected, actual):
+            max_score_error = max(max_score_error, abs(a['score'] - b['score']))
+    overlaps = np.array(overlaps)
+
+    report = {'n_users': n_users, 'k': k, 'mean_overlap': float(overlaps.mean()),
+              'min_overlap': float(overlaps.min()), 'exact_match_rate': float(np.mean(overlaps == 1.0)),
+              'max_score_error': max_score_error}
+    for name, model in (('float64', reference), ('float32', reduced)):
+        latencies = measure_latency(model, users, k, repeats)
+        report[name] = {
+            'memory_bytes': model.array_memory(),
+            'total_memory_bytes': sum(model.array_memory().values()),
+            'mean_latency_ms': float(latencies.mean()),
+            'p99_latency_ms': float(np.percentile(latencies, 99))
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate float32 model mode against float64")
+    parser.add_argument("--dataset", default="SRI_LANKA_TOUR_DATASET.xlsx")
+    parser.add_argument("--users", type=int, default=200, help="Synthetic users to compare")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3, help="Latency measurement repeats")
+    parser.add_argument("--threshold", type=float, default=0.95, help="Minimum mean top-k overlap")
+    parser.add_argument("--scoring-backend", default="numpy")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    report = compare_precision(args.dataset, args.users, args.k, args.repeats, args.scoring_backend)
+    passed = report['mean_overlap'] >= args.threshold
+
+    print("=" * 60)
+    print("REDUCED PRECISION VALIDATION (float32 vs float64)")
+    print("=" * 60)
+    print(f"Users: {report['n_users']}, k={report['k']}")
+    print(f"Top-{report['k']} overlap: mean {report['mean_overlap']:.4f}, min {report['min_overlap']:.4f}")
+    print(f"Identical top-{report['k']} sets: {report['exact_match_rate'] * 100:.1f}%")
+    print(f"Max score difference: {report['max_score_error']:.2e}")
+    print()
+    print(f"{'array':<28} {'float64 KB':>12} {'float32 KB':>12}")
+    for name, size in report['float64']['memory_bytes'].items():
+        print(f"{name:<28} {size / 1024:>12.1f} {report['float32']['memory_bytes'].get(name, 0) / 1024:>12.1f}")
+    print(f"{'total':<28} {report['float64']['total_memory_bytes'] / 1024:>12.1f} "
+          f"{report['float32']['total_memory_bytes'] / 1024:>12.1f}")
+    print()
+    for name in ('float64', 'float32'):
+        print(f"{name} latency: mean {report[name]['mean_latency_ms']:.3f} ms, "
+              f"p99 {report[name]['p99_latency_ms']:.3f} ms")
+    print()
+    print(f"RESULT: {'PASS' if passed else 'FAIL'} (threshold {args.threshold})")
+    print("=" * 60)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
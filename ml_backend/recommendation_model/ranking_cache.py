@@ -0,0 +1,101 @@
+# ranking_cache.py
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def ranking_nbytes(ranking: Dict[str, Any]) -> int:
+    """Bytes held by the arrays of a ranking"""
+    return sum(getattr(value, 'nbytes', 0) for value in ranking.values())
+
+
+class RankingCache:
+    """Bounded cache of full rankings addressed by opaque pagination cursors.
+
+    Each entry holds one ranking computed by ``rank_packages`` together with the
+    model generation it was computed against. Entries expire after ``ttl_seconds``
+    without access. Least recently used entries are evicted while the cached
+    rankings would hold more than ``max_bytes`` or more than ``max_entries``
+    entries; a single ranking larger than ``max_bytes`` is still kept, alone.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def put(self, ranking: Dict[str, Any], generation: int) -> str:
+        """Store a ranking and return its cache key"""
+        key = secrets.token_urlsafe(12)
+        size = ranking_nbytes(ranking)
+        with self._lock:
+            self._evict_expired()
+            while self._entries and (len(self._entries) >= self.max_entries
+                                     or self.nbytes + size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic(), generation, ranking)
+            self._sizes[key] = size
+            self.nbytes += size
+        return key
+
+    def get(self, key: str, generation: int) -> Optional[Dict[str, Any]]:
+        """Return the ranking for key, or None if it expired or belongs to another model generation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            last_used, entry_generation, ranking = entry
+            now = time.monotonic()
+            if entry_generation != generation or now - last_used > self.ttl_seconds:
+                self._remove(key)
+                return None
+            self._entries[key] = (now, entry_generation, ranking)
+            self._entries.move_to_end(key)
+            return ranking
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (last_used, _, _) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            self._remove(key)
+
+    def _remove(self, key: str):
+        del self._entries[key]
+        self.nbytes -= self._sizes.pop(key)
+
+
+def encode_cursor(key: str, offset: int, generation: int) -> str:
+    """Pack a cache key, page offset and model generation into an opaque cursor"""
+    raw = f"{key}:{offset}:{generation}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, offset, generation = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        offset = int(offset)
+        if offset < 0:
+            raise ValueError("negative offset")
+        return key, offset, int(generation)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
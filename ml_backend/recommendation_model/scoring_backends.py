@@ -0,0 +1,137 @@
+# scoring_backends.py
+"""Scoring backends used by TravelRecommendationModel.get_recommendations.
+
+A backend scores the selected rows for one query and returns the top-k row
+positions with their scores. Every backend must rank exactly like the NumPy
+backend: scores accumulated component by component in SCORE_COMPONENTS order,
+highest first, ties broken by position.
+"""
+import functools
+import logging
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ScoringBackend:
+    """Interface for scoring backends"""
+    name = "base"
+
+    def top_k(self, model, tables: Dict[str, Any], rows: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (positions into rows, scores) of the top_k packages, best first"""
+        raise NotImplementedError
+
+
+class NumpyScoringBackend(ScoringBackend):
+    """Vectorized scoring: gather each component, combine, then select the top-k"""
+    name = "numpy"
+
+    def top_k(self, model, tables, rows, top_k):
+        components = model._score_components(tables, rows)
+        scores = model._combine_scores(components)
+        top = model._top_k_positions(scores, top_k)
+        return top, scores[top]
+
+
+def _fused_top_k(rows, country_codes, duration_codes, month_codes, budget_codes, interest_codes,
+                 overnight_codes, content, country_table, duration_table, month_table, budget_table,
+                 interest_table, overnight_table, weights, top_k):
+    """Score each row and keep a running top-k in a single pass.
+
+    The top-k buffer is kept sorted by descending score; a new row only
+    displaces strictly lower scores, so earlier rows win ties.
+    """
+    top_positions = np.empty(top_k, dtype=np.int64)
+    top_scores = np.empty(top_k, dtype=weights.dtype)
+    n_top = 0
+
+    for i in range(len(rows)):
+        row = rows[i]
+        score = weights[0] * country_table[country_codes[row]]
+        score += weights[1] * duration_table[duration_codes[row]]
+        score += weights[2] * month_table[month_codes[row]]
+        score += weights[3] * budget_table[budget_codes[row]]
+        score += weights[4] * interest_table[interest_codes[row]]
+        score += weights[5] * overnight_table[overnight_codes[row]]
+        score += weights[6] * content[row]
+
+        if n_top < top_k:
+            j = n_top
+            n_top += 1
+        elif score > top_scores[top_k - 1]:
+            j = top_k - 1
+        else:
+            continue
+
+        while j > 0 and top_scores[j - 1] < score:
+            top_scores[j] = top_scores[j - 1]
+            top_positions[j] = top_positions[j - 1]
+            j -= 1
+        top_scores[j] = score
+        top_positions[j] = i
+
+    return top_positions[:n_top], top_scores[:n_top]
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_fused_top_k():
+    """JIT-wrap the fused kernel, or return None when Numba is not installed.
+
+    Numba is imported here rather than at module load because importing it
+    costs more than the rest of the serving import path.
+    """
+    try:
+        import numba
+    except ImportError:  # Numba is optional, the fused backend falls back to NumPy
+        return None
+    return numba.njit(cache=True, nogil=True)(_fused_top_k)
+
+
+class FusedScoringBackend(ScoringBackend):
+    """Single-pass Numba kernel without intermediate arrays.
+
+    Without Numba the pure-Python loop would be far slower than NumPy, so the
+    backend delegates to NumpyScoringBackend instead.
+    """
+    name = "fused"
+
+    def __init__(self):
+        self._fallback = None
+        self._kernel = _compile_fused_top_k()
+        if self._kernel is None:
+            logger.warning("Numba is not installed; fused scoring backend falls back to NumPy")
+            self._fallback = NumpyScoringBackend()
+
+    def top_k(self, model, tables, rows, top_k):
+        if self._fallback is not None:
+            return self._fallback.top_k(model, tables, rows, top_k)
+
+        if top_k <= 0 or len(rows) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=model.dtype)
+
+        codes = model.column_codes
+        weights = model._weight_vector()
+        positions, scores = self._kernel(
+            np.ascontiguousarray(rows),
+            codes['Tourist country'], codes['Duration_numeric'], codes['Month'], codes['Price USD'],
+            codes['Interest'], codes['Overnight_stay'], model.content_scores,
+            tables['country'], tables['duration'], tables['month'], tables['budget'],
+            tables['interest'], tables['overnight'], weights, min(top_k, len(rows))
+        )
+        return positions, scores
+
+
+SCORING_BACKENDS = {
+    NumpyScoringBackend.name: NumpyScoringBackend,
+    FusedScoringBackend.name: FusedScoringBackend
+}
+
+
+def get_scoring_backend(name: str) -> ScoringBackend:
+    """Instantiate a scoring backend by name"""
+    try:
+        return SCORING_BACKENDS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown scoring backend: {name}. Available: {', '.join(SCORING_BACKENDS)}")
@@ -0,0 +1,533 @@
+# serving.py
+"""Serving runtime for travel package recommendations.
+
+Everything needed to answer recommendation queries, using only NumPy: the
+catalogue columns, per-value codes and row indexes, and the scoring methods.
+The runtime is built by TravelRecommendationModel (model.py), which adds the
+pandas/scikit-learn preprocessing, or loaded from a runtime artifact written
+by save_runtime, so a serving process never imports the build stack.
+"""
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from scoring_backends import get_scoring_backend
+
+# Columns kept as plain arrays for scoring and building recommendation entries
+CATALOGUE_COLUMNS = ['Tourist country', 'Month', 'Price USD', 'Location', 'Interest', 'Activities', 'Overnight_stay']
+
+# Columns with a per-value code array and row index
+INDEXED_COLUMNS = ['Tourist country', 'Month', 'Price USD', 'Location', 'Interest', 'Overnight_stay']
+
+# Hard filter clause name -> dataset column
+FILTER_COLUMNS = {
+    'countries': 'Tourist country',
+    'months': 'Month',
+    'budget_levels': 'Price USD',
+    'locations': 'Location',
+    'overnight_stays': 'Overnight_stay'
+}
+
+# Columns whose cells list several values separated by commas, e.g. "Ella, Yala";
+# filter clauses on them also match each listed value
+LIST_COLUMNS = ['Location']
+
+# Score components in the order they are accumulated
+SCORE_COMPONENTS = ['country', 'duration', 'month', 'budget', 'interest', 'overnight', 'content']
+
+# Code column each table-scored component is gathered by
+COMPONENT_COLUMNS = {
+    'country': 'Tourist country',
+    'duration': 'Duration_numeric',
+    'month': 'Month',
+    'budget': 'Price USD',
+    'interest': 'Interest',
+    'overnight': 'Overnight_stay'
+}
+
+# Default weight per score component; tuning.py can replace these per model artifact
+DEFAULT_SCORING_WEIGHTS = {
+    'country': 0.25,     # Country match (25% weight)
+    'duration': 0.2,     # Duration match (20% weight)
+    'month': 0.15,       # Month match (15% weight)
+    'budget': 0.15,      # Budget compatibility (15% weight)
+    'interest': 0.15,    # Interest match (15% weight)
+    'overnight': 0.1,    # Overnight stay preference match (10% weight)
+    'content': 0.1       # Content similarity bonus (TF-IDF)
+}
+
+# Supported numeric precisions for model arrays and scoring
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
+
+def _code_dtype(n_values: int):
+    """Smallest integer dtype that can hold codes for n_values distinct values"""
+    if n_values <= np.iinfo(np.uint8).max + 1:
+        return np.uint8
+    if n_values <= np.iinfo(np.uint16).max + 1:
+        return np.uint16
+    return np.int32
+
+# Process-wide counter so every rebuilt index set gets a distinct generation
+_generations = itertools.count(1)
+
+
+# Version of the save_runtime artifact layout
+RUNTIME_FORMAT = 1
+
+class RecommendationRuntime:
+    """Catalogue arrays, scoring indexes and query methods; no fitting"""
+    
+    def __init__(self, scoring_backend: str = 'numpy', precision: str = 'float64'):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}. Use one of: {', '.join(PRECISIONS)}")
+        self.precision = precision
+        self.dtype = PRECISIONS[precision]
+        
+        self.scoring_weights = dict(DEFAULT_SCORING_WEIGHTS)
+        self.scoring_backend = get_scoring_backend(scoring_backend)
+        self.build_key = None  # Content hash of the build, set by build_cache
+        self.dataset_sha256 = None  # Content hash of the dataset file, set by build_cache
+        
+        # Scoring indexes, rebuilt whenever the catalogue changes
+        self.generation = 0
+        self.row_index = None
+        self.columns = {}
+        self.column_values = {}
+        self.column_codes = {}
+        self.value_index = {}
+        self.part_index = {}
+        self.duration_values = None
+        self.duration_order = None
+        self.duration_sorted = None
+        self.content_scores = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a catalogue is loaded and queries can be answered"""
+        return self.row_index is not None
+    
+    @property
+    def dataset_size(self) -> int:
+        """Number of packages in the loaded catalogue"""
+        return 0 if self.row_index is None else len(self.row_index)
+    
+    def set_catalogue(self, row_index: np.ndarray, columns: Dict[str, np.ndarray],
+                      duration_values: np.ndarray, content_scores: np.ndarray):
+        """Install catalogue arrays and precompute column codes and per-value row indexes"""
+        n_rows = len(row_index)
+        self.row_index = np.asarray(row_index)
+        self.columns = {}
+        for col in CATALOGUE_COLUMNS:
+            if col in columns:
+                self.columns[col] = np.asarray(columns[col]).astype(object)
+            else:
+                self.columns[col] = np.full(n_rows, '', dtype=object)
+        
+        # Per-value codes and sorted row-id arrays for each categorical column
+        self.column_values = {}
+        self.column_codes = {}
+        self.value_index = {}
+        for col in INDEXED_COLUMNS:
+            values, codes = np.unique(self.columns[col], return_inverse=True)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+            self.column_values[col] = values
+            self.column_codes[col] = codes.astype(_code_dtype(len(values)))
+            self.value_index[col] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(values)
+            }
+        
+        # Row indexes by listed value, the union of the rows of every cell that lists it
+        self.part_index = {}
+        for col in LIST_COLUMNS:
+            parts = {}
+            for value, rows in self.value_index[col].items():
+                for part in {part.strip() for part in value.split(',')} - {''}:
+                    parts.setdefault(part, []).append(rows)
+            self.part_index[col] = {part: np.sort(np.concatenate(rows)) for part, rows in parts.items()}
+        
+        # Durations are scored per distinct value like the categorical columns
+        self.duration_values = np.asarray(duration_values, dtype=self.dtype)
+        values, codes = np.unique(self.duration_values, return_inverse=True)
+        self.column_values['Duration_numeric'] = values
+        self.column_codes['Duration_numeric'] = codes.astype(_code_dtype(len(values)))
+        
+        # Sorted duration index for range filters
+        self.duration_order = np.argsort(self.duration_values, kind='stable')
+        self.duration_sorted = self.duration_values[self.duration_order]
+        
+        self.content_scores = np.asarray(content_scores, dtype=self.dtype)
+        self.generation = next(_generations)
+    
+    def calculate_interest_match_score(self, user_interests: List[str], package_interests: str) -> float:
+        """Calculate how well package interests match user interests"""
+        if not package_interests:
+            return 0.0
+        
+        package_interests = package_interests.lower()
+        user_interests = [interest.lower() for interest in user_interests]
+        
+        matches = 0
+        for interest in user_interests:
+            if interest in package_interests:
+                matches += 1
+        
+        return matches / len(user_interests) if user_interests else 0.0
+    
+    def calculate_budget_score(self, user_budget: str, package_budget: str) -> float:
+        """Calculate budget compatibility score"""
+        budget_mapping = {'low': 1, 'medium': 2, 'high': 3}
+        user_budget_num = budget_mapping.get(user_budget.lower(), 2)
+        package_budget_num = budget_mapping.get(package_budget.lower(), 2)
+        
+        # Perfect match gets score 1.0, adjacent budgets get 0.7, distant get 0.3
+        if user_budget_num == package_budget_num:
+            return 1.0
+        elif abs(user_budget_num - package_budget_num) == 1:
+            return 0.7
+        else:
+            return 0.3
+    
+    def calculate_overnight_score(self, user_overnight: str, package_overnight: str) -> float:
+        """Calculate overnight stay preference score"""
+        if user_overnight and package_overnight:
+            if user_overnight in package_overnight or package_overnight in user_overnight:
+                return 1.0
+            return 0.3  # Partial match bonus
+        elif not user_overnight:  # No preference specified, neutral score
+            return 0.5
+        return 0.0
+    
+    def filter_rows(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Resolve hard filter clauses to a sorted array of matching row positions.
+        
+        Returns None when no clause is set, so callers can score the whole catalogue.
+        """
+        if not filters:
+            return None
+        
+        clauses = []
+        for key, col in FILTER_COLUMNS.items():
+            values = filters.get(key)
+            if not values:
+                continue
+            # Values repeated after normalization would repeat their rows
+            values = list(dict.fromkeys(str(value).lower().strip() for value in values))
+            postings = [self.value_index[col].get(value) for value in values]
+            if col in self.part_index:
+                postings += [self.part_index[col].get(value) for value in values]
+            postings = [rows for rows in postings if rows is not None]
+            if not postings:
+                return np.empty(0, dtype=np.intp)
+            if col in self.part_index:
+                # Listed values share rows, so merge with a union
+                clauses.append(np.unique(np.concatenate(postings)))
+            else:
+                # Postings of different values are disjoint, so a sort is enough to merge them
+                clauses.append(np.sort(np.concatenate(postings)))
+        
+        min_duration = filters.get('min_duration')
+        max_duration = filters.get('max_duration')
+        if min_duration is not None or max_duration is not None:
+            lo = 0 if min_duration is None else np.searchsorted(self.duration_sorted, min_duration, side='left')
+            hi = len(self.duration_sorted) if max_duration is None else np.searchsorted(self.duration_sorted, max_duration, side='right')
+            clauses.append(np.sort(self.duration_order[lo:hi]))
+        
+        if not clauses:
+            return None
+        
+        # Intersect the most selective clauses first
+        clauses.sort(key=len)
+        rows = clauses[0]
+        for clause in clauses[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, clause, assume_unique=True)
+        return rows
+    
+    def _query_tables(self, user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+        """Score every distinct column value once for the given user preferences"""
+        user_country = user_preferences.get('country', '').lower().strip()
+        user_duration = int(user_preferences.get('duration', 7))
+        user_month = user_preferences.get('month', '').lower().strip()
+        user_budget = user_preferences.get('budget_level', 'medium').lower().strip()
+        user_interests = [interest.lower().strip() for interest in user_preferences.get('interests', [])]
+        user_overnight = user_preferences.get('overnight_stay', '').lower().strip()
+        
+        values = self.column_values
+        duration_diff = np.abs(values['Duration_numeric'] - user_duration)
+        return {
+            'country': (values['Tourist country'] == user_country).astype(self.dtype),
+            'duration': np.maximum(0, 1 - duration_diff / 10).astype(self.dtype),  # Normalize duration difference
+            'month': (values['Month'] == user_month).astype(self.dtype),
+            'budget': np.array([self.calculate_budget_score(user_budget, v) for v in values['Price USD']], dtype=self.dtype),
+            'interest': np.array([self.calculate_interest_match_score(user_interests, v) for v in values['Interest']], dtype=self.dtype),
+            'overnight': np.array([self.calculate_overnight_score(user_overnight, v) for v in values['Overnight_stay']], dtype=self.dtype)
+        }
+    
+    def _score_components(self, tables: Dict[str, Any], rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Gather per-component scores for the given row positions"""
+        components = {name: tables[name][self.column_codes[col][rows]] for name, col in COMPONENT_COLUMNS.items()}
+        components['content'] = self.content_scores[rows]
+        return components
+    
+    def _combine_scores(self, components: Dict[str, np.ndarray]) -> np.ndarray:
+        """Weighted sum of the score components"""
+        weights = self._weight_vector()
+        score = np.zeros(len(components['content']), dtype=self.dtype)
+        for c, name in enumerate(SCORE_COMPONENTS):
+            score += weights[c] * components[name]
+        return score
+    
+    def _weight_vector(self) -> np.ndarray:
+        """Scoring weights as an array in SCORE_COMPONENTS order"""
+        return np.array([self.scoring_weights[name] for name in SCORE_COMPONENTS], dtype=self.dtype)
+    
+    @staticmethod
+    def _top_k_positions(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Positions of the top_k scores, highest first, ties broken by position"""
+        if top_k >= len(scores):
+            return np.argsort(-scores, kind='stable')
+        if top_k <= 0:
+            return np.empty(0, dtype=np.intp)
+        kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+        candidates = np.flatnonzero(scores >= kth_score)
+        order = np.argsort(-scores[candidates], kind='stable')
+        return candidates[order][:top_k]
+    
+    def _build_recommendation(self, row: int, score: float, components: Dict[str, np.ndarray], i: int) -> Dict:
+        """Create a recommendation entry for one scored row"""
+        columns = self.columns
+        return {
+            'index': int(self.row_index[row]),
+            'score': float(score),
+            'country': columns['Tourist country'][row],
+            'month': columns['Month'][row],
+            'duration': float(self.duration_values[row]),
+            'budget': columns['Price USD'][row],
+            'location': columns['Location'][row],
+            'interests': columns['Interest'][row],
+            'activities': columns['Activities'][row],
+            'overnight_stay': columns['Overnight_stay'][row],
+            'duration_score': float(components['duration'][i]),
+            'budget_score': float(components['budget'][i]),
+            'interest_score': float(components['interest'][i]),
+            'overnight_score': float(components['overnight'][i])
+        }
+    
+    def array_memory(self) -> Dict[str, int]:
+        """Bytes held by the model's numeric arrays, by name"""
+        memory = {
+            'content_scores': self.content_scores,
+            'duration_values': self.duration_values,
+            'duration_order': self.duration_order,
+            'duration_sorted': self.duration_sorted
+        }
+        memory = {name: array.nbytes for name, array in memory.items() if array is not None}
+        memory['column_codes'] = sum(codes.nbytes for codes in self.column_codes.values())
+        memory['value_index'] = sum(rows.nbytes for index in self.value_index.values() for rows in index.values())
+        memory['part_index'] = sum(rows.nbytes for index in self.part_index.values() for rows in index.values())
+        return memory
+    
+    def get_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10,
+                            filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Generate travel package recommendations based on user preferences.
+        
+        Hard filters are resolved to a row set first, so only matching packages are scored.
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not trained. Please preprocess data first.")
+        
+        rows = self.filter_rows(filters)
+        if rows is None:
+            rows = np.arange(len(self.row_index))
+        if len(rows) == 0:
+            return []
+        
+        tables = self._query_tables(user_preferences)
+        top, scores = self.scoring_backend.top_k(self, tables, rows, top_k)
+        
+        # Component scores are only needed for the returned packages
+        selected = rows[top]
+        components = self._score_components(tables, selected)
+        return [self._build_recommendation(selected[i], scores[i], components, i) for i in range(len(selected))]
+    
+    def rank_packages(self, user_preferences: Dict[str, Any], filters: Optional[Dict[str, Any]] = None,
+                      diverse: bool = False) -> Dict[str, np.ndarray]:
+        """Rank every matching package, returning row positions, scores and components in rank order"""
+        if not self.is_loaded:
+            raise ValueError("Model not trained. Please preprocess data first.")
+        
+        rows = self.filter_rows(filters)
+        if rows is None:
+            rows = np.arange(len(self.row_index))
+        
+        tables = self._query_tables(user_preferences)
+        components = self._score_components(tables, rows)
+        scores = self._combine_scores(components)
+        
+        order = np.argsort(-scores, kind='stable')
+        if diverse:
+            order = order[self._diverse_order(rows[order])]
+        
+        ranking = {name: components[name][order] for name in ('duration', 'budget', 'interest', 'overnight')}
+        ranking['rows'] = rows[order]
+        ranking['scores'] = scores[order]
+        return ranking
+    
+    def _diverse_order(self, ranked_rows: np.ndarray) -> np.ndarray:
+        """Round-robin over locations: every location's best package first, then the second best, and so on"""
+        n_ranked = len(ranked_rows)
+        location_codes = self.column_codes['Location'][ranked_rows]
+        by_location = np.argsort(location_codes, kind='stable')
+        sorted_codes = location_codes[by_location]
+        group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, n_ranked])
+        occurrence = np.empty(n_ranked, dtype=np.intp)
+        occurrence[by_location] = np.arange(n_ranked) - np.repeat(group_starts, group_sizes)
+        return np.lexsort((np.arange(n_ranked), occurrence))
+    
+    def recommendations_from_ranking(self, ranking: Dict[str, np.ndarray], start: int, stop: int) -> List[Dict]:
+        """Build recommendation entries for a slice of a ranking from rank_packages"""
+        stop = min(stop, len(ranking['rows']))
+        return [self._build_recommendation(ranking['rows'][i], ranking['scores'][i], ranking, i)
+                for i in range(start, stop)]
+    
+    def get_recommendations_batch(self, user_preferences: List[Dict[str, Any]], top_k: List[int],
+                                  diverse: Optional[List[bool]] = None) -> List[List[Dict]]:
+        """Score several users at once as one users x packages matrix.
+        
+        Each user gets the same recommendations as get_recommendations (or
+        get_diverse_recommendations when its diverse flag is set).
+        """
+        if not self.is_loaded:
+            raise ValueError("Model not trained. Please preprocess data first.")
+        if not user_preferences:
+            return []
+        if diverse is None:
+            diverse = [False] * len(user_preferences)
+        
+        tables = [self._query_tables(prefs) for prefs in user_preferences]
+        scores = self._batch_scores(tables)
+        
+        results = []
+        for u, user_tables in enumerate(tables):
+            k = top_k[u] * 2 if diverse[u] else top_k[u]
+            selected = self._top_k_positions(scores[u], k)
+            components = self._score_components(user_tables, selected)
+            recommendations = [self._build_recommendation(row, scores[u, row], components, i)
+                               for i, row in enumerate(selected)]
+            results.append(self._diversify(recommendations, top_k[u]) if diverse[u] else recommendations)
+        return results
+    
+    def _batch_scores(self, tables: List[Dict[str, Any]], block_size: int = 2048) -> np.ndarray:
+        """Users x packages score matrix, accumulated like _combine_scores.
+        
+        Packages are processed in blocks so the per-component temporaries stay in cache.
+        """
+        weights = self._weight_vector()
+        n_rows = len(self.row_index)
+        stacked = {name: np.stack([user_tables[name] for user_tables in tables]) for name in COMPONENT_COLUMNS}
+        
+        scores = np.zeros((len(tables), n_rows), dtype=self.dtype)
+        buffer = np.empty((len(tables), min(block_size, n_rows)), dtype=self.dtype)
+        for start in range(0, n_rows, block_size):
+            stop = min(start + block_size, n_rows)
+            block = scores[:, start:stop]
+            term = buffer[:, :stop - start]
+            for c, name in enumerate(SCORE_COMPONENTS):
+                if name == 'content':
+                    np.multiply(weights[c], self.content_scores[start:stop], out=term)
+                else:
+                    codes = self.column_codes[COMPONENT_COLUMNS[name]][start:stop]
+                    np.take(stacked[name], codes, axis=1, out=term)
+                    np.multiply(weights[c], term, out=term)
+                block += term
+        return scores
+    
+    def get_diverse_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10,
+                                    filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Get diverse recommendations to avoid similar packages"""
+        initial_recommendations = self.get_recommendations(user_preferences, top_k * 2, filters)
+        return self._diversify(initial_recommendations, top_k)
+    
+    @staticmethod
+    def _diversify(initial_recommendations: List[Dict], top_k: int) -> List[Dict]:
+        """Pick top_k recommendations, avoiding too many from the same location"""
+        diverse_recommendations = []
+        seen_locations = set()
+        
+        for rec in initial_recommendations:
+            location = rec['location']
+            # Add some diversity by avoiding too many packages from same location
+            if location not in seen_locations or len(diverse_recommendations) < top_k // 2:
+                diverse_recommendations.append(rec)
+                seen_locations.add(location)
+                
+                if len(diverse_recommendations) >= top_k:
+                    break
+        
+        return diverse_recommendations
+    
+    def explain_recommendation(self, recommendation: Dict) -> str:
+        """Provide explanation for why a package was recommended"""
+        explanation = []
+        
+        if recommendation['score'] > 0.8:
+            explanation.append("Excellent match for your preferences!")
+        elif recommendation['score'] > 0.6:
+            explanation.append("Very good match for your preferences.")
+        elif recommendation['score'] > 0.4:
+            explanation.append("Good match with some of your preferences.")
+        else:
+            explanation.append("Partial match with your preferences.")
+        
+        if recommendation['duration_score'] > 0.8:
+            explanation.append(f"Duration ({recommendation['duration']} days) closely matches your preference.")
+        
+        if recommendation['budget_score'] > 0.7:
+            explanation.append("Budget level aligns well with your preference.")
+        
+        if recommendation['interest_score'] > 0.5:
+            explanation.append("Activities match several of your interests.")
+        
+        return " ".join(explanation)
+
+    def save_runtime(self, filepath: str):
+        """Save only what serving needs, as a NumPy archive readable without pickle"""
+        if not self.is_loaded:
+            raise ValueError("Model not trained. Please preprocess data first.")
+        meta = {
+            'format': RUNTIME_FORMAT,
+            'precision': self.precision,
+            'scoring_weights': self.scoring_weights,
+            'build_key': self.build_key
+        }
+        arrays = {f'column:{col}': self.columns[col].astype(str) for col in CATALOGUE_COLUMNS}
+        with open(filepath, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), row_index=self.row_index,
+                     duration_values=self.duration_values, content_scores=self.content_scores, **arrays)
+        logging.info(f"Runtime saved to {filepath}")
+    
+    def load_runtime(self, filepath: str):
+        """Load a runtime artifact written by save_runtime"""
+        try:
+            with np.load(filepath, allow_pickle=False) as artifact:
+                meta = json.loads(str(artifact['meta']))
+                if meta.get('format') != RUNTIME_FORMAT:
+                    raise ValueError(f"Unsupported runtime format: {meta.get('format')}")
+                columns = {col: artifact[f'column:{col}'] for col in CATALOGUE_COLUMNS}
+                # Arrays are converted to this runtime's precision, whatever the artifact was saved with
+                self.set_catalogue(artifact['row_index'], columns, artifact['duration_values'],
+                                   artifact['content_scores'])
+            self.scoring_weights = meta.get('scoring_weights', dict(DEFAULT_SCORING_WEIGHTS))
+            self.build_key = meta.get('build_key')
+            
+            logging.info(f"Runtime loaded from {filepath}")
+            return True
+        except Exception as e:
+            logging.error(f"Error loading runtime: {e}")
+            return False
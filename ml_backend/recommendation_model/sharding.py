@@ -0,0 +1,398 @@
+# sharding.py
+"""Catalogue sharding by a partition column.
+
+write_shards splits a loaded runtime into one runtime archive per distinct
+value of the key column (Tourist country by default) plus a manifest that
+records, per shard, the distinct values of every scored column. From the
+manifest alone ShardedRuntime can bound the best score any package in a
+shard could get for a query, so shards are visited best bound first and a
+shard is only scored while its bound can still reach the current top-k.
+
+Shards are loaded lazily, optionally keeping at most ``max_loaded`` in memory,
+or served by worker processes that each load only their own shards.
+Results are the same as scoring the unsharded catalogue: scores are computed
+per package exactly as before, and ties are broken by dataset index, which
+matches row order because df_processed keeps the default RangeIndex.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from serving import (RecommendationRuntime, INDEXED_COLUMNS, COMPONENT_COLUMNS, SCORE_COMPONENTS,
+                     PRECISIONS, _generations)
+from logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+
+SHARD_MANIFEST = 'manifest.json'
+
+# Columns whose distinct values the manifest records per shard
+SUMMARY_COLUMNS = INDEXED_COLUMNS + ['Duration_numeric']
+
+
+# Per-package arrays of a ranking from rank_packages, besides the shard ids
+RANKING_FIELDS = ['rows', 'scores', 'duration', 'budget', 'interest', 'overnight']
+
+
+def _shard_build_name(runtime, key: str) -> str:
+    """Directory name for one sharded build; builds with the same content and weights share it"""
+    if runtime.build_key is None:
+        return uuid.uuid4().hex[:16]
+    weights = json.dumps(runtime.scoring_weights, sort_keys=True)
+    return hashlib.sha256(f"{runtime.build_key}:{key}:{runtime.precision}:{weights}".encode()).hexdigest()[:16]
+
+
+def write_shards(runtime, directory: str, key: str = 'Tourist country', keep: int = 4) -> str:
+    """Partition runtime's catalogue by the key column into one runtime archive per value.
+
+    Returns the directory of this sharded build. A build of the same content,
+    key and scoring weights is reused; older builds beyond ``keep`` are removed.
+    """
+    if key not in INDEXED_COLUMNS:
+        raise ValueError(f"Unsupported shard key: {key}. Use one of: {', '.join(INDEXED_COLUMNS)}")
+    if not runtime.is_loaded:
+        raise ValueError("Model not trained. Please preprocess data first.")
+
+    build_dir = os.path.join(directory, _shard_build_name(runtime, key))
+    if os.path.exists(os.path.join(build_dir, SHARD_MANIFEST)):
+        os.utime(build_dir)  # Mark as recently used for pruning
+        return build_dir
+
+    tmp_dir = f"{build_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp_dir)
+    shards = []
+    for i, value in enumerate(runtime.column_values[key]):
+        rows = runtime.value_index[key][value]
+        shard = RecommendationRuntime(precision=runtime.precision)
+        shard.set_catalogue(runtime.row_index[rows], {col: array[rows] for col, array in runtime.columns.items()},
+                            runtime.duration_values[rows], runtime.content_scores[rows])
+        shard.scoring_weights = dict(runtime.scoring_weights)
+        shard.build_key = runtime.build_key
+
+        file_name = f"shard-{i:05d}.npz"
+        shard.save_runtime(os.path.join(tmp_dir, file_name))
+        shards.append({
+            'value': str(value),
+            'file': file_name,
+            'size': int(len(rows)),
+            'content_max': float(shard.content_scores.max()),
+            'values': {col: shard.column_values[col].tolist() for col in SUMMARY_COLUMNS}
+        })
+
+    manifest = {
+        'key': key,
+        'precision': runtime.precision,
+        'scoring_weights': runtime.scoring_weights,
+        'build_key': runtime.build_key,
+        'shards': shards
+    }
+    with open(os.path.join(tmp_dir, SHARD_MANIFEST), 'w') as f:
+        json.dump(manifest, f)
+
+    # Publish the whole build at once; a concurrent writer of the same build wins harmlessly
+    try:
+        os.rename(tmp_dir, build_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _prune_builds(directory, keep)
+    logger.info(f"Wrote {len(shards)} shards by '{key}' to {build_dir}")
+    return build_dir
+
+
+def _prune_builds(directory: str, keep: int):
+    builds = [os.path.join(directory, name) for name in os.listdir(directory)
+              if os.path.isfile(os.path.join(directory, name, SHARD_MANIFEST))]
+    builds.sort(key=os.path.getmtime, reverse=True)
+    for path in builds[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Worker process state: shard id -> archive path, and the shards loaded so far
+_worker_paths: Dict[int, str] = {}
+_worker_shards: Dict[int, RecommendationRuntime] = {}
+_worker_options: Dict[str, str] = {}
+
+
+def _init_shard_worker(paths: Dict[int, str], scoring_backend: str, precision: str, log_level: int):
+    # A spawned worker starts with no logging configured; give it its own JSON writer
+    setup_logging(level=log_level)
+    _worker_paths.update(paths)
+    _worker_options.update(scoring_backend=scoring_backend, precision=precision)
+
+
+def _worker_shard(shard_id: int) -> RecommendationRuntime:
+    shard = _worker_shards.get(shard_id)
+    if shard is None:
+        shard = RecommendationRuntime(**_worker_options)
+        if not shard.load_runtime(_worker_paths[shard_id]):
+            raise RuntimeError(f"Failed to load shard {_worker_paths[shard_id]}")
+        _worker_shards[shard_id] = shard
+    return shard
+
+
+def _shard_recommendations(shard_id: int, user_preferences: Dict[str, Any], top_k: int,
+                           filters: Optional[Dict[str, Any]]) -> List[Dict]:
+    return _worker_shard(shard_id).get_recommendations(user_preferences, top_k, filters)
+
+
+def _shard_ranking(shard_id: int, user_preferences: Dict[str, Any],
+                   filters: Optional[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    return _ranking_arrays(_worker_shard(shard_id), user_preferences, filters)
+
+
+def _shard_entries(shard_id: int, ranking: Dict[str, np.ndarray]) -> List[Dict]:
+    return _worker_shard(shard_id).recommendations_from_ranking(ranking, 0, len(ranking['rows']))
+
+
+def _ranking_arrays(shard: RecommendationRuntime, user_preferences: Dict[str, Any],
+                    filters: Optional[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """A shard's full ranking plus the dataset index and location code of every ranked row"""
+    ranking = shard.rank_packages(user_preferences, filters)
+    ranking['index'] = shard.row_index[ranking['rows']]
+    ranking['location'] = shard.column_codes['Location'][ranking['rows']]
+    return ranking
+
+
+def _merge(candidate_lists: List[List[Dict]], top_k: Optional[int] = None) -> List[Dict]:
+    """Merge recommendation lists by score, highest first, ties broken by dataset index"""
+    merged = sorted((rec for recs in candidate_lists for rec in recs), key=lambda rec: (-rec['score'], rec['index']))
+    return merged if top_k is None else merged[:top_k]
+
+
+class ShardedRuntime:
+    """Answers recommendation queries over a sharded build written by write_shards"""
+
+    explain_recommendation = RecommendationRuntime.explain_recommendation
+
+    def __init__(self, directory: str, scoring_backend: str = 'numpy', precision: str = 'float64',
+                 workers: int = 0, max_loaded: int = 0):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}. Use one of: {', '.join(PRECISIONS)}")
+        with open(os.path.join(directory, SHARD_MANIFEST)) as f:
+            manifest = json.load(f)
+
+        self.directory = directory
+        self.precision = precision
+        self.dtype = PRECISIONS[precision]
+        self.scoring_backend_name = scoring_backend
+        self.shard_key = manifest['key']
+        self.scoring_weights = manifest['scoring_weights']
+        self.build_key = manifest['build_key']
+        self.shards = manifest['shards']
+        self.max_loaded = max_loaded
+        self.generation = next(_generations)
+
+        # Distinct values across the whole catalogue, as the unsharded runtime reports them
+        shard_values = {col: [np.array(shard['values'][col], dtype=self.dtype if col == 'Duration_numeric' else object)
+                              for shard in self.shards] for col in SUMMARY_COLUMNS}
+        self.column_values = {col: np.unique(np.concatenate(values)) for col, values in shard_values.items()}
+
+        # Score tables are computed once per query over all distinct values; each shard's bound
+        # is then the maximum over its own values, found with one reduceat per component
+        self._tables = RecommendationRuntime(precision=precision)
+        self._tables.column_values = self.column_values
+        self._bound_positions = {}
+        for name, col in COMPONENT_COLUMNS.items():
+            positions = [np.searchsorted(self.column_values[col], values) for values in shard_values[col]]
+            offsets = np.cumsum([0] + [len(p) for p in positions[:-1]])
+            self._bound_positions[name] = (np.concatenate(positions), offsets)
+        self._content_max = np.array([shard['content_max'] for shard in self.shards], dtype=self.dtype)
+
+        # Shard-local location codes -> catalogue-wide codes, for diverse rankings
+        self._location_codes = [np.searchsorted(self.column_values['Location'], values)
+                                for values in shard_values['Location']]
+
+        # Counters reported by /model-info
+        self.queries = 0
+        self.shards_scored = 0
+
+        self._loaded: "OrderedDict[int, RecommendationRuntime]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Each worker owns a fixed subset of shards, so a shard is only ever loaded in one process.
+        # Workers are spawned, not forked: a fork would inherit the log queue without its writer
+        # thread, silently dropping every record, and could copy a lock that thread holds
+        self._workers = []
+        context = multiprocessing.get_context('spawn')
+        log_level = logging.getLogger().getEffectiveLevel()
+        for w in range(workers):
+            paths = {i: self._shard_path(i) for i in range(w, len(self.shards), workers)}
+            self._workers.append(ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_shard_worker,
+                                                     initargs=(paths, scoring_backend, precision, log_level)))
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    @property
+    def dataset_size(self) -> int:
+        return sum(shard['size'] for shard in self.shards)
+
+    def _shard_path(self, shard_id: int) -> str:
+        return os.path.join(self.directory, self.shards[shard_id]['file'])
+
+    def _shard(self, shard_id: int) -> RecommendationRuntime:
+        """Load a shard on first use, evicting the least recently used beyond max_loaded"""
+        with self._lock:
+            shard = self._loaded.get(shard_id)
+            if shard is not None:
+                self._loaded.move_to_end(shard_id)
+                return shard
+        shard = RecommendationRuntime(scoring_backend=self.scoring_backend_name, precision=self.precision)
+        if not shard.load_runtime(self._shard_path(shard_id)):
+            raise RuntimeError(f"Failed to load shard {self._shard_path(shard_id)}")
+        with self._lock:
+            self._loaded[shard_id] = shard
+            while self.max_loaded and len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return shard
+
+    def upper_bounds(self, user_preferences: Dict[str, Any]) -> np.ndarray:
+        """Highest score any package in each shard could get, accumulated like the real scores"""
+        weights = np.array([self.scoring_weights[name] for name in SCORE_COMPONENTS], dtype=self.dtype)
+        tables = self._tables._query_tables(user_preferences)
+        bounds = np.zeros(len(self.shards), dtype=self.dtype)
+        for c, name in enumerate(SCORE_COMPONENTS):
+            if name == 'content':
+                best = self._content_max
+            else:
+                positions, offsets = self._bound_positions[name]
+                best = np.maximum.reduceat(tables[name][positions], offsets)
+            bounds += weights[c] * best
+        return bounds
+
+    def _query_shards(self, shard_ids: List[int], user_preferences: Dict[str, Any], top_k: int,
+                      filters: Optional[Dict[str, Any]]) -> List[List[Dict]]:
+        if not self._workers:
+            return [self._shard(s).get_recommendations(user_preferences, top_k, filters) for s in shard_ids]
+        futures = [self._workers[s % len(self._workers)].submit(_shard_recommendations, s, user_preferences,
+                                                                 top_k, filters) for s in shard_ids]
+        return [future.result() for future in futures]
+
+    def get_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10,
+                            filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Top-k over all shards, scoring only shards whose bound can still reach the top-k"""
+        if top_k <= 0:
+            return []
+        self.queries += 1
+        bounds = self.upper_bounds(user_preferences)
+        pending = [int(s) for s in np.argsort(-bounds, kind='stable')]
+
+        # The best-bound shard (the user's own country when sharding by country) goes first
+        # alone; in worker mode the remaining reachable shards are then scored in parallel
+        wave_size = 1
+        results: List[Dict] = []
+        while pending:
+            if len(results) >= top_k:
+                kth_score = results[-1]['score']
+                # A bound equal to the k-th score can still win on a tie with a lower index
+                pending = [s for s in pending if bounds[s] >= kth_score]
+            wave, pending = pending[:wave_size], pending[wave_size:]
+            if not wave:
+                break
+            results = _merge([results] + self._query_shards(wave, user_preferences, top_k, filters), top_k)
+            self.shards_scored += len(wave)
+            wave_size = len(self._workers) or 1
+        return results
+
+    def get_diverse_recommendations(self, user_preferences: Dict[str, Any], top_k: int = 10,
+                                    filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Get diverse recommendations to avoid similar packages"""
+        return RecommendationRuntime._diversify(self.get_recommendations(user_preferences, top_k * 2, filters), top_k)
+
+    def get_recommendations_batch(self, user_preferences: List[Dict[str, Any]], top_k: List[int],
+                                  diverse: Optional[List[bool]] = None) -> List[List[Dict]]:
+        """Per-user results like get_recommendations / get_diverse_recommendations"""
+        if diverse is None:
+            diverse = [False] * len(user_preferences)
+        return [self.get_diverse_recommendations(prefs, k) if div else self.get_recommendations(prefs, k)
+                for prefs, k, div in zip(user_preferences, top_k, diverse)]
+
+    def rank_packages(self, user_preferences: Dict[str, Any], filters: Optional[Dict[str, Any]] = None,
+                      diverse: bool = False) -> Dict[str, np.ndarray]:
+        """Rank every matching package across all shards.
+
+        A full ranking needs every shard, so nothing is pruned. Shards return
+        arrays, which are merged by (-score, index); the ranking keeps the
+        shard and row of every package, and entries are only built for the
+        slices recommendations_from_ranking is asked for.
+        """
+        shard_ids = list(range(len(self.shards)))
+        if self._workers:
+            futures = [self._workers[s % len(self._workers)].submit(_shard_ranking, s, user_preferences, filters)
+                       for s in shard_ids]
+            rankings = [future.result() for future in futures]
+        else:
+            rankings = [_ranking_arrays(self._shard(s), user_preferences, filters) for s in shard_ids]
+
+        shard_dtype = np.int16 if len(self.shards) <= np.iinfo(np.int16).max else np.int32
+        shards = np.concatenate([np.full(len(ranking['rows']), s, dtype=shard_dtype)
+                                 for s, ranking in zip(shard_ids, rankings)])
+        merged = {name: np.concatenate([ranking[name] for ranking in rankings]) for name in RANKING_FIELDS}
+        index = np.concatenate([ranking['index'] for ranking in rankings])
+        order = np.lexsort((index, -merged['scores']))
+
+        if diverse:
+            # Round-robin over locations, as RecommendationRuntime._diverse_order
+            locations = np.concatenate([self._location_codes[s][ranking['location']]
+                                        for s, ranking in zip(shard_ids, rankings)])[order]
+            by_location = np.argsort(locations, kind='stable')
+            sorted_locations = locations[by_location]
+            group_starts = np.flatnonzero(np.r_[True, sorted_locations[1:] != sorted_locations[:-1]])
+            group_sizes = np.diff(np.r_[group_starts, len(order)])
+            occurrence = np.empty(len(order), dtype=np.intp)
+            occurrence[by_location] = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+            order = order[np.lexsort((np.arange(len(order)), occurrence))]
+
+        ranking = {name: values[order] for name, values in merged.items()}
+        ranking['shards'] = shards[order]
+        return ranking
+
+    def recommendations_from_ranking(self, ranking: Dict[str, np.ndarray], start: int, stop: int) -> List[Dict]:
+        """Build recommendation entries for a slice of a ranking from rank_packages"""
+        stop = min(stop, len(ranking['rows']))
+        if start >= stop:
+            return []
+        shards = ranking['shards'][start:stop]
+        parts = {int(s): np.flatnonzero(shards == s) for s in np.unique(shards)}
+        slices = {s: {name: ranking[name][start:stop][at] for name in RANKING_FIELDS} for s, at in parts.items()}
+        if self._workers:
+            futures = {s: self._workers[s % len(self._workers)].submit(_shard_entries, s, part)
+                       for s, part in slices.items()}
+            built = {s: future.result() for s, future in futures.items()}
+        else:
+            built = {s: self._shard(s).recommendations_from_ranking(part, 0, len(part['rows']))
+                     for s, part in slices.items()}
+
+        entries: List[Optional[Dict]] = [None] * (stop - start)
+        for s, at in parts.items():
+            for i, entry in zip(at, built[s]):
+                entries[i] = entry
+        return entries
+
+    def shard_info(self) -> Dict[str, Any]:
+        """Shard layout and residency, for /model-info"""
+        return {
+            'key': self.shard_key,
+            'shards': len(self.shards),
+            'loaded': len(self._loaded),
+            'max_loaded': self.max_loaded,
+            'workers': len(self._workers),
+            'largest_shard': max((shard['size'] for shard in self.shards), default=0),
+            'mean_shards_scored': self.shards_scored / self.queries if self.queries else 0.0
+        }
+
+    def close(self):
+        """Stop worker processes; queries already submitted still complete"""
+        for executor in self._workers:
+            executor.shutdown(wait=False)
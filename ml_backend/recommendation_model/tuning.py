@@ -0,0 +1,237 @@
+# tuning.py
+"""Offline tuning of the scoring weights used by get_recommendations.
+
+The per-component scores of every (test user, package) pair are computed once,
+after which each candidate weight vector is only a weighted sum plus a top-k
+selection. Candidates are evaluated across a process pool.
+
+Usage:
+    python tuning.py --model travel_recommendation_model.pkl --method random --candidates 5000
+    python tuning.py --dataset SRI_LANKA_TOUR_DATASET.xlsx --method surrogate --output travel_recommendation_model.pkl
+"""
+import argparse
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from model import TravelRecommendationModel, SCORE_COMPONENTS, DEFAULT_SCORING_WEIGHTS
+
+# Candidate weights are rescaled to this total so scores keep the range explain_recommendation expects
+TOTAL_WEIGHT = sum(DEFAULT_SCORING_WEIGHTS.values())
+
+# Matrices shared with pool workers, set by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def compute_component_matrices(model: TravelRecommendationModel, test_users: List[Dict]) -> np.ndarray:
+    """Per-component scores for every user and package, shaped (components, users, packages)"""
+    rows = np.arange(len(model.row_index))
+    matrices = np.empty((len(SCORE_COMPONENTS), len(test_users), len(rows)))
+    for u, user in enumerate(test_users):
+        components = model._score_components(model._query_tables(user), rows)
+        for c, name in enumerate(SCORE_COMPONENTS):
+            matrices[c, u] = components[name]
+    return matrices
+
+
+def compute_relevance(model: TravelRecommendationModel, test_users: List[Dict]) -> np.ndarray:
+    """Relevance of every package for every user, using the rule from calculate_precision_at_k"""
+    columns = model.columns
+    interest_values = model.column_values['Interest']
+    interest_codes = model.column_codes['Interest']
+    relevance = np.zeros((len(test_users), len(model.row_index)), dtype=bool)
+
+    for u, user in enumerate(test_users):
+        user_interests = [i.lower() for i in user['interests']]
+        interest_table = np.zeros(len(interest_values))
+        for v, value in enumerate(interest_values):
+            matches = sum(1 for interest in user_interests if interest in value.lower())
+            if matches > 0:
+                interest_table[v] = 0.1 * (matches / len(user_interests))
+
+        score = np.zeros(len(model.row_index))
+        score += 0.4 * (columns['Tourist country'] == user['country'].lower())
+        score += 0.2 * (np.abs(model.duration_values - user['duration']) <= 2)
+        score += 0.2 * (columns['Month'] == user['month'].lower())
+        score += 0.1 * (columns['Price USD'] == user['budget_level'].lower())
+        score += interest_table[interest_codes]
+        relevance[u] = score >= 0.5
+
+    return relevance
+
+
+def evaluate_weights(candidates: np.ndarray, components: np.ndarray, relevance: np.ndarray, k: int) -> np.ndarray:
+    """Mean precision@k over all users for each candidate weight vector"""
+    precisions = np.empty(len(candidates))
+    for i, weights in enumerate(candidates):
+        # Accumulate in the same order as _combine_scores so ties rank identically
+        scores = np.zeros(components.shape[1:])
+        for c in range(len(weights)):
+            scores += weights[c] * components[c]
+        top = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        precisions[i] = np.take_along_axis(relevance, top, axis=1).sum(axis=1).mean() / k
+    return precisions
+
+
+def _init_worker(components: np.ndarray, relevance: np.ndarray, k: int):
+    _worker_state['components'] = components
+    _worker_state['relevance'] = relevance
+    _worker_state['k'] = k
+
+
+def _evaluate_chunk(candidates: np.ndarray) -> np.ndarray:
+    return evaluate_weights(candidates, _worker_state['components'], _worker_state['relevance'], _worker_state['k'])
+
+
+def evaluate_parallel(candidates: np.ndarray, components: np.ndarray, relevance: np.ndarray, k: int,
+                      workers: Optional[int] = None, chunk_size: int = 128) -> np.ndarray:
+    """Evaluate candidates across a process pool; workers=1 evaluates in-process"""
+    if workers == 1 or len(candidates) <= chunk_size:
+        return evaluate_weights(candidates, components, relevance, k)
+
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(components, relevance, k)) as pool:
+        return np.concatenate(list(pool.map(_evaluate_chunk, chunks)))
+
+
+def random_candidates(n_candidates: int, seed: int = 42) -> np.ndarray:
+    """Weight vectors sampled uniformly from the simplex"""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.ones(len(SCORE_COMPONENTS)), size=n_candidates) * TOTAL_WEIGHT
+
+
+def grid_candidates(step: float = 0.1) -> np.ndarray:
+    """All weight vectors on the simplex with the given resolution"""
+    n_steps = int(round(1 / step))
+    n_components = len(SCORE_COMPONENTS)
+    candidates = []
+    # Stars and bars: choose divider positions among n_steps + n_components - 1 slots
+    for dividers in itertools.combinations(range(n_steps + n_components - 1), n_components - 1):
+        bounds = (-1,) + dividers + (n_steps + n_components - 1,)
+        candidates.append([bounds[i + 1] - bounds[i] - 1 for i in range(n_components)])
+    return np.array(candidates, dtype=float) / n_steps * TOTAL_WEIGHT
+
+
+def tune_scoring_weights(model: TravelRecommendationModel, method: str = 'random', n_candidates: int = 2000,
+                         grid_step: float = 0.1, n_users: int = 100, n_holdout: int = 50, k: int = 10,
+                         workers: Optional[int] = None, seed: int = 42, surrogate_pool: int = 50000,
+                         surrogate_top: int = 500) -> Dict[str, Any]:
+    """Search for scoring weights that maximise precision@k on synthetic test users.
+
+    method is 'random', 'grid' or 'surrogate'. The surrogate search evaluates
+    n_candidates random vectors, fits a RandomForestRegressor on the results,
+    and then evaluates the surrogate_top best of surrogate_pool predicted vectors.
+    The best weights are set on the model; call save_model to persist them.
+    """
+    if model.df_processed is None:
+        raise ValueError("Model not loaded")
+
+    users = model.create_test_users(n_users + n_holdout)
+    train_users, holdout_users = users[:n_users], users[n_users:]
+
+    start = time.perf_counter()
+    components = compute_component_matrices(model, train_users)
+    relevance = compute_relevance(model, train_users)
+    precompute_seconds = time.perf_counter() - start
+
+    default = np.array([[DEFAULT_SCORING_WEIGHTS[name] for name in SCORE_COMPONENTS]])
+    if method == 'grid':
+        candidates = grid_candidates(grid_step)
+    elif method in ('random', 'surrogate'):
+        candidates = random_candidates(n_candidates, seed)
+    else:
+        raise ValueError(f"Unknown tuning method: {method}")
+    candidates = np.vstack([default, candidates])
+
+    start = time.perf_counter()
+    precisions = evaluate_parallel(candidates, components, relevance, k, workers)
+
+    if method == 'surrogate':
+        from sklearn.ensemble import RandomForestRegressor
+
+        surrogate = RandomForestRegressor(n_estimators=200, random_state=seed, n_jobs=-1)
+        surrogate.fit(candidates, precisions)
+        pool = random_candidates(surrogate_pool, seed + 1)
+        promising = pool[np.argsort(-surrogate.predict(pool))[:surrogate_top]]
+        candidates = np.vstack([candidates, promising])
+        precisions = np.concatenate([precisions, evaluate_parallel(promising, components, relevance, k, workers)])
+    search_seconds = time.perf_counter() - start
+
+    best = int(np.argmax(precisions))
+    best_weights = {name: float(w) for name, w in zip(SCORE_COMPONENTS, candidates[best])}
+
+    # Check the winner against the defaults on users not used for the search
+    holdout_components = compute_component_matrices(model, holdout_users)
+    holdout_relevance = compute_relevance(model, holdout_users)
+    holdout = evaluate_weights(np.vstack([default, candidates[best:best + 1]]),
+                               holdout_components, holdout_relevance, k)
+
+    model.scoring_weights = best_weights
+    return {
+        'method': method,
+        'weights': best_weights,
+        'precision': float(precisions[best]),
+        'default_precision': float(precisions[0]),
+        'holdout_precision': float(holdout[1]),
+        'holdout_default_precision': float(holdout[0]),
+        'candidates_evaluated': len(candidates),
+        'precompute_seconds': precompute_seconds,
+        'search_seconds': search_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune recommendation scoring weights")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--model", help="Trained model pickle to tune")
+    source.add_argument("--dataset", help="Dataset (.xlsx/.csv) to preprocess and tune")
+    parser.add_argument("--output", help="Where to save the tuned model (defaults to --model)")
+    parser.add_argument("--method", choices=["random", "grid", "surrogate"], default="random")
+    parser.add_argument("--candidates", type=int, default=2000, help="Random candidates to evaluate")
+    parser.add_argument("--grid-step", type=float, default=0.1, help="Simplex resolution for grid search")
+    parser.add_argument("--users", type=int, default=100, help="Synthetic users to tune on")
+    parser.add_argument("--holdout", type=int, default=50, help="Synthetic users held out for validation")
+    parser.add_argument("--k", type=int, default=10, help="Cut-off for precision@k")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    model = TravelRecommendationModel()
+    if args.model:
+        if not model.load_model(args.model):
+            raise SystemExit(f"Could not load model from {args.model}")
+    else:
+        if not model.load_data(args.dataset):
+            raise SystemExit(f"Could not load dataset from {args.dataset}")
+        model.preprocess_data()
+
+    result = tune_scoring_weights(model, method=args.method, n_candidates=args.candidates,
+                                  grid_step=args.grid_step, n_users=args.users, n_holdout=args.holdout,
+                                  k=args.k, workers=args.workers)
+
+    print("=" * 50)
+    print("SCORING WEIGHT TUNING")
+    print("=" * 50)
+    print(f"Method: {result['method']} ({result['candidates_evaluated']} candidates)")
+    print(f"Precompute: {result['precompute_seconds']:.2f}s, search: {result['search_seconds']:.2f}s")
+    print(f"PRECISION@{args.k} (tuning users):  default {result['default_precision']:.3f} -> tuned {result['precision']:.3f}")
+    print(f"PRECISION@{args.k} (holdout users): default {result['holdout_default_precision']:.3f} -> tuned {result['holdout_precision']:.3f}")
+    print("Weights:")
+    for name, weight in result['weights'].items():
+        print(f"  {name}: {weight:.3f}")
+
+    output = args.output or args.model
+    if output:
+        model.save_model(output)
+        print(f"Saved tuned model to {output}")
+
+
+if __name__ == "__main__":
+    main()